@@ -0,0 +1,88 @@
+"""
+Per-step SUMO latency as the network grows.
+
+Generates grid scenarios of increasing size (cached by
+simulation/generate_network.py), runs each headless under fixed-time
+control for a number of steps and reports wall time per step against
+the number of signals and running vehicles.
+
+Usage:
+    python benchmarks/scaling_benchmark.py --sizes 1x1 2x2 4x4 8x8
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import traci
+import sumolib
+
+from simulation.generate_network import generate_scenario
+
+
+def run_scenario(cfg, steps):
+    traci.start([sumolib.checkBinary("sumo"), "-c", cfg, "--no-step-log", "true"])
+    num_tls = len(traci.trafficlight.getIDList())
+
+    step_times = np.empty(steps)
+    vehicles = np.empty(steps)
+    for i in range(steps):
+        t0 = time.perf_counter()
+        traci.simulationStep()
+        step_times[i] = time.perf_counter() - t0
+        vehicles[i] = traci.vehicle.getIDCount()
+
+    traci.close()
+    return {
+        "tls": num_tls,
+        "mean_vehicles": float(vehicles.mean()),
+        "max_vehicles": int(vehicles.max()),
+        "step_ms_p50": float(np.percentile(step_times, 50) * 1000),
+        "step_ms_p99": float(np.percentile(step_times, 99) * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SUMO scaling benchmark")
+    parser.add_argument("--sizes", nargs="+", default=["1x1", "2x2", "4x4", "8x8"])
+    parser.add_argument("--demand-per-signal", type=int, default=600,
+                        help="vehicles per hour per signalised junction")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--out", default="logs/scaling_benchmark.csv")
+    args = parser.parse_args()
+
+    rows_out = []
+    for size in args.sizes:
+        rows, cols = (int(x) for x in size.split("x"))
+        demand = args.demand_per_signal * rows * cols
+
+        t0 = time.perf_counter()
+        cfg = generate_scenario(rows=rows, cols=cols, demand=demand, end=args.steps)
+        gen_s = time.perf_counter() - t0
+
+        result = run_scenario(cfg, args.steps)
+        result.update({"size": size, "demand": demand, "generate_s": gen_s})
+        rows_out.append(result)
+
+        print(
+            f"{size:>6} | TLS={result['tls']:3d} | "
+            f"veh mean={result['mean_vehicles']:7.1f} max={result['max_vehicles']:5d} | "
+            f"step p50={result['step_ms_p50']:.3f}ms p99={result['step_ms_p99']:.3f}ms | "
+            f"gen={gen_s:.2f}s"
+        )
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows_out[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows_out)
+    print(f"📊 Results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
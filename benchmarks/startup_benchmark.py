@@ -0,0 +1,61 @@
+"""
+Cold start to first decision for the controllers.
+
+Runs each controller as a fresh process with STARTUP_BENCHMARK=1 (see
+control/startup.py), once with lazy parallel loading and once with the
+sequential path, and reports the timings each process prints. SUMO runs
+headless (SUMO_BINARY=sumo) and the controller closes TraCI when it
+exits after the first decision, so no SUMO processes are left behind.
+
+Usage:
+    python benchmarks/startup_benchmark.py --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+CONTROLLERS = ["control/hybrid_control.py", "control/fixed_control.py"]
+
+
+def run_once(controller, lazy):
+    env = dict(os.environ, STARTUP_BENCHMARK="1", LAZY_STARTUP="1" if lazy else "0",
+               SUMO_BINARY="sumo")
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, controller], cwd=ROOT, env=env,
+        capture_output=True, text=True
+    )
+    wall = time.perf_counter() - t0
+
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            timings = json.loads(line[len("STARTUP "):])
+            timings["wall"] = wall
+            return timings
+    raise RuntimeError(f"{controller} did not report startup timings:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Controller cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--controllers", nargs="+", default=CONTROLLERS)
+    args = parser.parse_args()
+
+    for controller in args.controllers:
+        for lazy in (False, True):
+            runs = [run_once(controller, lazy) for _ in range(args.runs)]
+            keys = [k for k in runs[0] if k != "lazy"]
+            summary = " | ".join(
+                f"{k}={statistics.median(r[k] for r in runs):.2f}s" for k in keys
+            )
+            print(f"{controller:28s} lazy={str(lazy):5s} | {summary}")
+
+
+if __name__ == "__main__":
+    main()
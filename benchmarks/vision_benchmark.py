@@ -0,0 +1,273 @@
+"""
+Throughput and latency of the vision pipeline.
+
+For each source (synthetic clips at several resolutions and optional
+recorded clips), decodes frames with the full-resolution cv2 reader and
+the reduced-resolution ffmpeg reader (vision/frame_source.py), then runs
+VehicleDetector over them at several batch sizes and confidence
+thresholds. Decode, inference and post-processing (box filtering, lane
+mapping, tracking) are timed separately and reported per frame as
+p50/p99. Each configuration runs in a fresh process, so its peak RSS is
+its own: rss_peak_mb is the process peak and rss_delta_mb the growth
+over the loaded detector, which includes torch/ultralytics memory that
+the tracemalloc figure (py_alloc_peak_mb, Python allocations only)
+cannot see. The end-to-end calls the controllers make
+(get_lane_density, VisionLaneSensor) are timed per call.
+
+Usage:
+    python benchmarks/vision_benchmark.py --resolutions 640x360 1280x720 1920x1080 \\
+        --batch-sizes 1 4 8 --confs 0.25 0.5 --clips test_video.mp4
+"""
+import argparse
+import csv
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+
+from sensors.vision_sensor import VisionLaneSensor
+from vision import lane_density
+from vision.frame_source import DETECT_WIDTH, open_video
+from vision.lane_density import get_detector, make_tracker
+from vision.lane_mapper import get_lane_mapper
+
+CAMERA = "default"
+
+
+def synthetic_clip(path, width, height, frames, fps=30, seed=0):
+    """Gray road with a few boxes driving down it, encoded with mp4v."""
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    n = 12
+    size = np.column_stack([rng.integers(width // 20, width // 8, n),
+                            rng.integers(height // 15, height // 6, n)])
+    pos = np.column_stack([rng.integers(0, width, n), rng.integers(0, height, n)])
+    speed = rng.integers(1, max(height // 60, 2), n)
+    colors = rng.integers(0, 255, (n, 3))
+
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    for _ in range(frames):
+        frame[:] = 90
+        for (w, h), (x, y), c in zip(size, pos, colors):
+            cv2.rectangle(frame, (int(x), int(y)), (int(x + w), int(y + h)), c.tolist(), -1)
+        pos[:, 1] = (pos[:, 1] + speed) % height
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def rss_mb():
+    """Peak RSS of this process; ru_maxrss is in KB on Linux."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mb():
+    with open("/proc/self/statm") as f:
+        resident = int(f.read().split()[1])
+    return resident * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def percentiles(times):
+    ms = np.asarray(times) * 1000
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 99))
+
+
+def decode(source, reader, frames):
+    """Per-frame decode times and the decoded frames (copied out of reusable buffers)."""
+    cap = open_video(source, DETECT_WIDTH) if reader == "ffmpeg" else cv2.VideoCapture(str(source))
+    times, out = [], []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        dt = time.perf_counter() - t0
+        if not ret:
+            break
+        times.append(dt)
+        out.append(frame.copy())
+    cap.release()
+    return times, out
+
+
+def detect(detector, frames, batch, conf, warmup=2):
+    """Per-frame inference and post-processing times over `frames` in batches."""
+    detector.conf = conf
+    mapper = get_lane_mapper(CAMERA)
+    tracker = make_tracker(CAMERA)
+    batches = [frames[i:i + batch] for i in range(0, len(frames), batch)]
+
+    for chunk in batches[:warmup]:
+        detector.model(chunk, conf=conf, verbose=False)
+
+    infer, post = [], []
+    tracemalloc.start()
+    for b, chunk in enumerate(batches):
+        t0 = time.perf_counter()
+        results = detector.model(chunk, conf=conf, verbose=False)
+        t1 = time.perf_counter()
+        for i, (frame, result) in enumerate(zip(chunk, results)):
+            boxes = detector._vehicle_boxes(result)
+            boxes, lane_idx = mapper.assign(boxes, frame.shape)
+            tracker.update(boxes, lane_idx, (b * batch + i) / 30.0)
+            tracker.lane_metrics(len(mapper.lane_names))
+        t2 = time.perf_counter()
+        infer += [(t1 - t0) / len(chunk)] * len(chunk)
+        post += [(t2 - t1) / len(chunk)] * len(chunk)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return infer, post, peak / 2**20
+
+
+def end_to_end(source, calls):
+    """Per-call latency of the two entry points the controllers use."""
+    results = {}
+
+    cap = open_video(source)
+    get = lambda: lane_density.get_lane_density(cap=cap, camera=CAMERA)
+    get()
+    times = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        get()
+        times.append(time.perf_counter() - t0)
+    cap.release()
+    results["get_lane_density"] = percentiles(times)
+
+    sensor = VisionLaneSensor(str(source), camera=CAMERA)
+    sensor.get_metrics()
+    times = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        sensor.get_metrics()
+        times.append(time.perf_counter() - t0)
+    sensor.cap.release()
+    results["VisionLaneSensor"] = percentiles(times)
+    return results
+
+
+def run_config(source, reader, frames, batch, conf):
+    """One configuration, meant to run in its own process (--config)."""
+    detector = get_detector()
+    lane_density.MOTION_GATING = False  # time every frame through YOLO
+    base_rss = current_rss_mb()
+
+    decode_times, decoded = decode(source, reader, frames)
+    if not decoded:
+        return None
+    h, w = decoded[0].shape[:2]
+    infer, post, alloc_mb = detect(detector, decoded, batch, conf)
+
+    dec_p50, dec_p99 = percentiles(decode_times)
+    inf_p50, inf_p99 = percentiles(infer)
+    post_p50, post_p99 = percentiles(post)
+    total = np.sum(decode_times) + np.sum(infer) + np.sum(post)
+    peak = rss_mb()
+    return {
+        "reader": reader, "decoded": f"{w}x{h}",
+        "batch": batch, "conf": conf, "frames": len(decoded),
+        "decode_ms_p50": dec_p50, "decode_ms_p99": dec_p99,
+        "infer_ms_p50": inf_p50, "infer_ms_p99": inf_p99,
+        "post_ms_p50": post_p50, "post_ms_p99": post_p99,
+        "fps": len(decoded) / total,
+        "py_alloc_peak_mb": alloc_mb, "rss_peak_mb": peak, "rss_delta_mb": peak - base_rss,
+    }
+
+
+def run_config_process(source, reader, frames, batch, conf):
+    """run_config in a fresh interpreter; None if it failed or decoded nothing."""
+    config = {"source": str(source), "reader": reader, "frames": frames, "batch": batch, "conf": conf}
+    proc = subprocess.run(
+        [sys.executable, __file__, "--config", json.dumps(config)],
+        capture_output=True, text=True
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("ROW "):
+            return json.loads(line[len("ROW "):])
+    if proc.returncode != 0:
+        print(f"config {config} failed:\n{proc.stderr[-2000:]}")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vision pipeline benchmark")
+    parser.add_argument("--resolutions", nargs="+", default=["640x360", "1280x720", "1920x1080"])
+    parser.add_argument("--clips", nargs="*", default=[], help="recorded videos to include")
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--confs", type=float, nargs="+", default=[0.25, 0.5])
+    parser.add_argument("--readers", nargs="+", default=["cv2", "ffmpeg"])
+    parser.add_argument("--e2e-calls", type=int, default=50)
+    parser.add_argument("--out", default="logs/vision_benchmark.csv")
+    parser.add_argument("--config", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.config:
+        c = json.loads(args.config)
+        row = run_config(Path(c["source"]), c["reader"], c["frames"], c["batch"], c["conf"])
+        if row is not None:
+            print("ROW " + json.dumps(row), flush=True)
+        return
+
+    lane_density.MOTION_GATING = False  # time every frame through YOLO
+
+    tmp = tempfile.TemporaryDirectory()
+    sources = []
+    for res in args.resolutions:
+        w, h = (int(x) for x in res.split("x"))
+        path = Path(tmp.name) / f"synthetic_{res}.mp4"
+        sources.append((f"synthetic {res}", synthetic_clip(path, w, h, args.frames)))
+    sources += [(f"clip {Path(c).name}", Path(c)) for c in args.clips]
+
+    rows_out = []
+    for name, source in sources:
+        for reader in args.readers:
+            if reader == "ffmpeg" and not shutil.which("ffmpeg"):
+                print(f"{name} | ffmpeg not on PATH, skipped")
+                continue
+
+            for batch in args.batch_sizes:
+                for conf in args.confs:
+                    row = run_config_process(source, reader, args.frames, batch, conf)
+                    if row is None:
+                        print(f"{name} | {reader} b={batch} conf={conf:.2f}: no result, skipped")
+                        continue
+                    row = {"source": name, **row}
+                    rows_out.append(row)
+                    print(
+                        f"{name:>22} | {reader:6s} {row['decoded']:>9} | b={batch:2d} conf={conf:.2f} | "
+                        f"decode {row['decode_ms_p50']:6.2f}/{row['decode_ms_p99']:6.2f}ms | "
+                        f"infer {row['infer_ms_p50']:6.2f}/{row['infer_ms_p99']:6.2f}ms | "
+                        f"post {row['post_ms_p50']:5.2f}/{row['post_ms_p99']:5.2f}ms | "
+                        f"{row['fps']:6.1f} fps | py alloc {row['py_alloc_peak_mb']:6.1f}MB | "
+                        f"rss {row['rss_peak_mb']:6.0f}MB (+{row['rss_delta_mb']:.0f}MB)"
+                    )
+
+        for entry, (p50, p99) in end_to_end(source, args.e2e_calls).items():
+            print(f"{name:>22} | {entry:18s} | per call p50={p50:.2f}ms p99={p99:.2f}ms")
+
+    tmp.cleanup()
+
+    if not rows_out:
+        print("No configuration produced results; nothing saved")
+        return
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows_out[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows_out)
+    print(f"📊 Results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
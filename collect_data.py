@@ -4,6 +4,8 @@ import numpy as np
 import pandas as pd
 import os
 
+from rl.env_utils import get_controlled_lanes
+
 sumoBinary = sumolib.checkBinary("sumo")
 
 traci.start([
@@ -14,15 +16,15 @@ traci.start([
 
 data = []
 
+# Same lane set as training, so the logs can feed train_offline.py
+lanes = get_controlled_lanes()
+
 step = 0
 current_green_end = 0
 
 while step < 2000:
     traci.simulationStep()
 
-    tls_id = traci.trafficlight.getIDList()[0]
-    lanes = traci.trafficlight.getControlledLanes(tls_id)
-
     lane_states = []
     for lane in lanes:
         queue = traci.lane.getLastStepHaltingNumber(lane)
@@ -1,13 +1,132 @@
-from metrics import MetricsLogger
-import subprocess
+"""
+Compare signal controllers on the same scenario.
 
-def run(controller):
-    logger = MetricsLogger()
-    subprocess.run(["python", controller])
-    return logger.results()
+Each controller drives a headless SUMO run that writes tripinfo, summary
+and E2 outputs (simulation/outputs.py); the runs are then summarized
+from those files, so every controller is measured the same way and no
+controller pays for TraCI polling it doesn't need.
 
-fixed = run("fixed_control.py")
-ml = run("control.py")
+All controllers run the programmed yellow transitions for their
+programmed durations and choose only greens: fixed-time holds every
+green for FIXED_GREEN, the DQN holds its chosen green on the first TLS
+(the other TLS run their programs), max-pressure switches after
+MIN_GREEN.
 
-print("FIXED:", fixed)
-print("ML:", ml)
+Usage:
+    python compare.py --controllers fixed max_pressure rl
+"""
+import argparse
+import csv
+import os
+
+import traci, sumolib
+import numpy as np
+
+from control.max_pressure import MaxPressureController
+from simulation.network_index import load_network_index, net_file_of
+from simulation.outputs import output_args, load_outputs, summarize
+
+SUMO_CFG = "simulation/sim.sumocfg"
+OUTPUT_DIR = "logs/compare"
+MAX_STEPS = 2000
+FIXED_GREEN = 30
+MIN_GREEN = 10
+CONTROLLERS = ["fixed", "max_pressure", "rl"]
+COLUMNS = ["trips", "unfinished", "throughput", "mean_halting", "waiting_mean", "waiting_p95",
+           "delay_mean", "delay_p95", "travel_time_mean"]
+
+
+def run_fixed(index, max_steps):
+    """
+    Every TLS runs its own program with each green set to FIXED_GREEN
+    seconds (yellows keep their durations); SUMO runs it in one call.
+    """
+    for tls_id in index.tls_ids:
+        greens = set(index.green_phases(tls_id))
+        program = traci.trafficlight.getProgram(tls_id)
+        logic = next(l for l in traci.trafficlight.getAllProgramLogics(tls_id) if l.programID == program)
+        for p, phase in enumerate(logic.phases):
+            if p in greens:
+                phase.duration = phase.minDur = phase.maxDur = FIXED_GREEN
+        traci.trafficlight.setProgramLogic(tls_id, logic)
+        traci.trafficlight.setPhase(tls_id, 0)
+    traci.simulationStep(max_steps)
+
+
+def run_max_pressure(index, max_steps):
+    controller = MaxPressureController(index, MIN_GREEN)
+    controller.subscribe()
+    controller.apply(np.arange(len(controller.tls_ids)), controller.phase)
+    for _ in range(max_steps):
+        traci.simulationStep()
+        controller.apply(*controller.step(controller.read_counts()))
+
+
+def run_rl(index, max_steps):
+    """
+    The trained DQN on the first TLS with the training/evaluation phase
+    dynamics (rl.env_utils.to_next_green), as in train_rl.py and eval_rl.py.
+    """
+    from eval_rl import action_space
+    from rl.agent import DQNAgent
+    from rl.env_utils import get_state, hold_phase, to_next_green
+
+    tls = index.tls_ids[0]
+    lanes = index.controlled_lanes(tls)
+    greens = set(index.green_phases(tls))
+    durations = index.tls[tls]["durations"]
+    agent = DQNAgent(len(lanes) * 3, len(action_space))
+    agent.load("models/dqn_traffic.pt")
+    agent.epsilon = 0.0
+
+    sim_step = 0
+    while sim_step < max_steps:
+        green = action_space[agent.act(get_state(lanes))]
+        sim_step, _ = to_next_green(tls, greens, durations, sim_step, max_steps, green)
+        sim_step, _ = hold_phase(green, sim_step, max_steps)
+
+
+RUNNERS = {"fixed": run_fixed, "max_pressure": run_max_pressure, "rl": run_rl}
+
+
+def evaluate(name, index, args):
+    out_dir = os.path.join(args.out_dir, name)
+    lanes = sorted({lane for tls_id in index.tls_ids for lane in index.controlled_lanes(tls_id)})
+    traci.start([sumolib.checkBinary("sumo"), "-c", args.cfg] + output_args(out_dir, lanes))
+    try:
+        RUNNERS[name](index, args.steps)
+    finally:
+        traci.close()
+    return summarize(*load_outputs(out_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare signal controllers from SUMO outputs")
+    parser.add_argument("--controllers", nargs="+", choices=CONTROLLERS, default=CONTROLLERS)
+    parser.add_argument("--cfg", default=SUMO_CFG)
+    parser.add_argument("--steps", type=int, default=MAX_STEPS)
+    parser.add_argument("--out-dir", default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    index = load_network_index(net_file_of(args.cfg))
+
+    rows = []
+    for name in args.controllers:
+        print(f"Running {name}...")
+        metrics = evaluate(name, index, args)
+        rows.append({"controller": name, **{c: metrics[c] for c in COLUMNS}})
+
+    print(f"\n{'controller':>14} | " + " | ".join(f"{c:>16}" for c in COLUMNS))
+    for row in rows:
+        print(f"{row['controller']:>14} | " + " | ".join(f"{row[c]:16.2f}" for c in COLUMNS))
+
+    path = os.path.join(args.out_dir, "compare.csv")
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["controller"] + COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"📊 Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,37 @@
 import sys
 import time
 import subprocess
-import pickle
 import os
 from pathlib import Path
-from collections import defaultdict
-
-log = defaultdict(list)
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from telemetry import TelemetryWriter
+
+log = TelemetryWriter()
+
+from control.startup import Startup, load_vision
+from vision.sampler import VisionSampler, VisionTrack
+from vision.frame_ring import RingCapture
+from vision.frame_source import open_video
+
 import traci
-import cv2
 import numpy as np
 
-from vision.lane_density import get_lane_density
+# ultralytics and OpenCV (vision) are imported by the startup loader
+# while SUMO boots
+from rl.reward import compute_rewards, QUEUE
+from sensors.base import FEATURES
+from sensors.sumo_sensor import SumoBatchSensor
+from simulation.network_index import load_network_index, net_file_of
 
 # ============= LANE MAPPING =============
+# Camera lane name, also the approach it watches in the network index
 VIDEO_LANE = "north_in"
 SUMO_LANES = []  # Will auto-detect from SUMO
 
 # ============= CONFIG =============
-SUMO_BINARY = "sumo-gui"
+SUMO_BINARY = os.environ.get("SUMO_BINARY", "sumo-gui")
 SUMO_CFG = "simulation/sim.sumocfg"
 PORT = 51824  # Different port from hybrid
 
@@ -30,6 +40,14 @@ FIXED_GREEN_DURATION = 30  # seconds per phase
 MAX_STEPS = 2000
 VIDEO_PATH = "test_video.mp4"
 
+# Video is only logged here, never used for control: sample it off the
+# critical path every N simulated seconds, or read a precomputed track
+# (vision/sampler.py) and join the counts onto the step log by time
+VISION_SAMPLE_EVERY = 10
+VISION_TRACK = None  # e.g. "data/video_track.csv"
+# Decode video in a separate process (shared-memory frame ring)
+CAPTURE_PROCESS = True
+
 # ====================================
 
 def start_sumo():
@@ -39,35 +57,58 @@ def start_sumo():
         "--step-length", "1",
         "--remote-port", str(PORT)
     ])
-    time.sleep(2)
 
 def main():
     global SUMO_LANES
     
+    # Detector loads (and warms up) while SUMO starts
+    startup = Startup({} if VISION_TRACK else {"vision": load_vision})
+    
+    # Static signal layout from the cached network index (no TraCI queries)
+    index = load_network_index(net_file_of(SUMO_CFG))
+    tls_id = index.tls_ids[0]
+    phases = index.num_phases(tls_id)
+    
     start_sumo()
-    traci.init(PORT)
-
-    tls_id = traci.trafficlight.getIDList()[0]
-    phases = len(traci.trafficlight.getAllProgramLogics(tls_id)[0].phases)
+    traci.init(PORT, numRetries=30)
+    startup.on_close(traci.close)
+    startup.mark("sumo_connected")
 
     print(f"Connected to SUMO | TLS={tls_id} | phases={phases}")
 
-    # Get unique controlled lanes
-    all_lanes = list(set(traci.trafficlight.getControlledLanes(tls_id)))
+    all_lanes = index.controlled_lanes(tls_id)
     if len(all_lanes) == 0:
         print("ERROR: No controlled lanes found")
-        traci.close()
+        startup.close()
         return
 
-    # Use first 3 lanes as SUMO lanes
-    SUMO_LANES = all_lanes[:3] if len(all_lanes) >= 3 else all_lanes
+    # Same split as the hybrid controller: the camera covers the
+    # VIDEO_LANE approach, SUMO measures the other approaches
+    SUMO_LANES = [lane for lane in all_lanes if index.approach[lane] != VIDEO_LANE]
     
     print(f"Video lane: {VIDEO_LANE}")
     print(f"SUMO lanes: {SUMO_LANES}")
     print(f"Fixed green duration: {FIXED_GREEN_DURATION}s\n")
     
-    # Initialize video capture
-    video_cap = cv2.VideoCapture(VIDEO_PATH)
+    # SUMO lane metrics arrive via subscriptions with every step
+    sumo_sensor = SumoBatchSensor(SUMO_LANES)
+    sumo_buf = np.empty((len(SUMO_LANES), len(FEATURES)), dtype=np.float32)
+    
+    # Video side channel
+    if VISION_TRACK:
+        sampler = VisionTrack(VISION_TRACK)
+    else:
+        lane_density = startup.get("vision")
+        if CAPTURE_PROCESS:
+            video_cap = RingCapture(VIDEO_PATH)
+        else:
+            video_cap = open_video(VIDEO_PATH)
+        startup.on_close(video_cap.release)
+        sampler = VisionSampler(
+            lambda: lane_density.get_lane_density(cap=video_cap).get(VIDEO_LANE, 0),
+            every=VISION_SAMPLE_EVERY
+        )
+    startup.on_close(sampler.close)
     
     sim_step = 0
     decision = 0
@@ -77,16 +118,16 @@ def main():
     print("Starting FIXED (baseline) control...\n")
     
     while sim_step < MAX_STEPS:
-        # Get video density (for logging, but not used for control)
-        from vision.lane_density import get_lane_density
-        video_density = get_lane_density(cap=video_cap)
-        video_count = video_density.get(VIDEO_LANE, 0)
+        # Kick off a video sample if one is due (never blocks)
+        sampler.request(sim_step)
         
         # Fixed timing: change phase every FIXED_GREEN_DURATION steps
         if green_counter == 0:
             current_phase = traci.trafficlight.getPhase(tls_id)
             next_phase = (current_phase + 1) % phases
             traci.trafficlight.setPhase(tls_id, next_phase)
+            if decision == 0:
+                startup.first_decision()
             decision += 1
             green_counter = FIXED_GREEN_DURATION
             current_decision_phase = next_phase
@@ -97,40 +138,42 @@ def main():
         green_counter -= 1
         
         # Compute metrics
-        total_queue = sum(traci.lane.getLastStepHaltingNumber(l) for l in SUMO_LANES)
-        total_wait = sum(traci.lane.getWaitingTime(l) for l in SUMO_LANES)
-        reward = -(0.7 * total_queue + 0.3 * total_wait)
+        sumo_sensor.fill(sumo_buf)
+        total_queue = int(sumo_buf[:, QUEUE].sum())
+        reward = float(compute_rewards(sumo_buf, kind="queue_wait"))
         total_reward += reward
         
         # Log data
-        log["step"].append(sim_step)
-        log["green"].append(FIXED_GREEN_DURATION)  # Always same
-        log["phase"].append(traci.trafficlight.getPhase(tls_id))
-        log["queue"].append(total_queue)
-        log["reward"].append(reward)
-        log["video_count"].append(video_count)
+        log.append(
+            step=sim_step,
+            green=FIXED_GREEN_DURATION,  # Always same
+            phase=traci.trafficlight.getPhase(tls_id),
+            queue=total_queue,
+            reward=reward,
+        )
         
         # Print every 10 decisions
         if decision % 10 == 0:
             avg_reward = total_reward / decision
+            video_count = int(sampler.join([sim_step])[0])
             print(
                 f"Decision {decision:3d} | Step {sim_step:4d} | "
                 f"Green={FIXED_GREEN_DURATION}s | Video_count={video_count:2d} | "
                 f"Queue={total_queue:2d} | Avg_Reward={avg_reward:.2f}"
             )
     
-    video_cap.release()
-    traci.close()
+    startup.close()
+    
+    # Join the video samples onto the step log by simulation time
+    log["video_count"] = sampler.join(log["step"]).tolist()
     
     print(f"\n✅ Fixed control simulation complete!")
     print(f"Total decisions: {decision}")
     print(f"Final average reward: {total_reward / decision:.2f}")
-    print(f"Total queue time: {sum(log['queue'])}")
+    print(f"Total queue time: {log.totals['queue'].total:.0f}")
 
-    # Save logs
-    os.makedirs("logs", exist_ok=True)
-    with open("logs/fixed_control_log.pkl", "wb") as f:
-        pickle.dump(log, f)
+    # Save logs (plus precomputed summary for the dashboard)
+    log.save("logs/fixed_control_log.pkl")
     print(f"📊 Logs saved to logs/fixed_control_log.pkl")
 
 
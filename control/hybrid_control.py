@@ -1,38 +1,55 @@
 import sys
 import time
 import subprocess
-import pickle
 import os
 from pathlib import Path
-from collections import defaultdict
-
-log = defaultdict(list)
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from telemetry import TelemetryWriter
+
+log = TelemetryWriter()
+
+from control.startup import Startup, load_policy, load_vision
+from vision.frame_ring import RingCapture
+from vision.frame_source import open_video
+
 import traci
-import cv2
 import numpy as np
 
-from rl.agent import DQNAgent
-from rl.reward import compute_reward
-from vision.lane_density import get_lane_density
+# torch (rl.agent), ultralytics and OpenCV (vision) are imported by the
+# startup loaders while SUMO boots
+from rl.reward import compute_rewards, QUEUE
+from rl.env_utils import hold_phase
+from sensors.base import FusedBatchSensor, FEATURES
+from sensors.sumo_sensor import SumoBatchSensor
+from simulation.network_index import load_network_index, net_file_of
 
 # ============= LANE MAPPING =============
-# Define which lane is monitored by video and which by SUMO
+# Define which lane is monitored by video and which by SUMO: VIDEO_LANE is
+# the camera lane name and the approach it replaces in the network index
 VIDEO_LANE = "north_in"
 SUMO_LANES = []  # Will auto-detect from SUMO
 
 # ============= CONFIG =============
-SUMO_BINARY = "sumo-gui"
+SUMO_BINARY = os.environ.get("SUMO_BINARY", "sumo-gui")
 SUMO_CFG = "simulation/sim.sumocfg"
 PORT = 51823
 
 MODEL_PATH = "models/dqn_traffic.pt"
 ACTIONS = [10, 20, 30, 40, 50, 60]
+STATE_SIZE = None  # (video lane + SUMO lanes) × 3 features, from the network index
 MAX_STEPS = 2000
 VIDEO_PATH = "test_video.mp4"
 
+# Run the next detection on a worker thread while SUMO holds green,
+# so the decision at the end of the hold uses an already computed result
+PIPELINED = True
+
+# Decode video in a separate capture process; frames reach the detector
+# through a shared-memory ring instead of sharing the GIL with TraCI
+CAPTURE_PROCESS = True
+
 # ====================================
 
 def start_sumo():
@@ -42,124 +59,143 @@ def start_sumo():
         "--step-length", "1",
         "--remote-port", str(PORT)
     ])
-    time.sleep(2)
 
-def get_hybrid_state(video_density, sumo_lanes):
+def make_hybrid_sensor(read_video, sumo_lanes, video_lanes):
     """
-    Combine video-based and SUMO-based state into single vector.
+    Fuse the video lane and the SUMO lanes into one batch sensor.
     
     Args:
-        video_density: dict {"north_in": vehicle_count}
+        read_video: callable returning the tracked video metrics array
+            (vision.lane_density.get_lane_metrics)
         sumo_lanes: list of lane IDs from SUMO
+        video_lanes: the camera's lane names (rows of the video array)
     
     Returns:
-        np.array of shape (12,) for trained model
-        [video_features(3), sumo_lane1(3), sumo_lane2(3), sumo_lane3(3)]
+        (fused, video_sensor, sumo_sensor); fused fills a
+        (1 + len(sumo_lanes), 3) array that flattens to the state for the
+        trained model [video_features(3), sumo_lane1(3), sumo_lane2(3), ...]
     """
-    state = []
+    from sensors.vision_sensor import VisionBatchSensor
     
-    # Video-monitored lane (3 features)
-    video_count = video_density.get(VIDEO_LANE, 0)
-    state.append(float(video_count))                    # queue
-    state.append(float(video_count * 2.0))              # proxy waiting time
-    state.append(max(1.0, 15.0 - float(video_count)))   # proxy speed (inverse)
-    
-    # SUMO-monitored lanes (3 features each)
-    for lane_id in sumo_lanes:
-        queue = traci.lane.getLastStepHaltingNumber(lane_id)
-        wait = traci.lane.getWaitingTime(lane_id)
-        speed = traci.lane.getLastStepMeanSpeed(lane_id)
-        
-        state.append(float(queue))
-        state.append(float(wait))
-        state.append(float(speed))
-    
-    return np.array(state, dtype=np.float32)
+    video_sensor = VisionBatchSensor([VIDEO_LANE], read_video, video_lanes)
+    sumo_sensor = SumoBatchSensor(sumo_lanes)
+    fused = FusedBatchSensor(
+        [VIDEO_LANE] + list(sumo_lanes),
+        [video_sensor, sumo_sensor]
+    )
+    return fused, video_sensor, sumo_sensor
 
 def main():
-    global SUMO_LANES
+    global SUMO_LANES, STATE_SIZE
     
-    start_sumo()
-    traci.init(PORT)
-
-    tls_id = traci.trafficlight.getIDList()[0]
-    phases = len(traci.trafficlight.getAllProgramLogics(tls_id)[0].phases)
+    # Static signal layout from the cached network index (no TraCI queries)
+    index = load_network_index(net_file_of(SUMO_CFG))
+    tls_id = index.tls_ids[0]
+    phases = index.num_phases(tls_id)
 
-    print(f"Connected to SUMO | TLS={tls_id} | phases={phases}")
-
-    # Get unique controlled lanes
-    all_lanes = list(set(traci.trafficlight.getControlledLanes(tls_id)))
+    all_lanes = index.controlled_lanes(tls_id)
     if len(all_lanes) == 0:
         print("ERROR: No controlled lanes found")
-        traci.close()
         return
 
-    # Separate into VIDEO lane + SUMO lanes
-    # For now: use first 3 real lanes as SUMO lanes, video is synthetic
-    SUMO_LANES = all_lanes[:3] if len(all_lanes) >= 3 else all_lanes
+    # Separate into VIDEO lane + SUMO lanes: the camera covers the
+    # VIDEO_LANE approach, SUMO measures the other approaches. The state
+    # size follows the net, so the model at MODEL_PATH must have been
+    # trained with the same number of lanes.
+    SUMO_LANES = [lane for lane in all_lanes if index.approach[lane] != VIDEO_LANE]
+    STATE_SIZE = (len(SUMO_LANES) + 1) * len(FEATURES)
+    
+    # Detector and policy load (and warm up) while SUMO starts
+    startup = Startup({
+        "policy": lambda warm: load_policy(STATE_SIZE, len(ACTIONS), MODEL_PATH, warm),
+        "vision": load_vision,
+    })
     
+    start_sumo()
+    traci.init(PORT, numRetries=30)
+    startup.on_close(traci.close)
+    startup.mark("sumo_connected")
+
+    print(f"Connected to SUMO | TLS={tls_id} | phases={phases}")
     print(f"Video lane: {VIDEO_LANE}")
     print(f"SUMO lanes: {SUMO_LANES}")
-    print(f"State size: 4 lanes × 3 features = 12")
+    print(f"State size: {len(SUMO_LANES) + 1} lanes × {len(FEATURES)} features = {STATE_SIZE}")
     
-    # Load trained RL agent
-    state_size = 12  # 4 lanes × 3 features
-    agent = DQNAgent(state_size, len(ACTIONS))
-    agent.load(MODEL_PATH)
-    agent.epsilon = 0.0
+    # Trained RL agent (loaded in the background)
+    agent = startup.get("policy")
     
     print(f"✅ Loaded RL model from {MODEL_PATH}\n")
     
     # Initialize video capture
-    video_cap = cv2.VideoCapture(VIDEO_PATH)
+    lane_density = startup.get("vision")
+    if CAPTURE_PROCESS:
+        video_cap = RingCapture(VIDEO_PATH)
+    else:
+        video_cap = open_video(VIDEO_PATH)
+    startup.on_close(video_cap.release)
+    if PIPELINED:
+        density_worker = lane_density.LaneDensityWorker(video_cap, lane_density.get_lane_metrics)
+        startup.on_close(density_worker.close)
+        read_video = lambda: density_worker.result(sim_t=sim_step)
+    else:
+        # Waiting time on the video lane accumulates in simulation seconds
+        read_video = lambda: lane_density.get_lane_metrics(cap=video_cap, sim_t=sim_step)
+    
+    video_lanes = lane_density.get_lane_mapper(lane_density.CAMERA).lane_names
+    video_count_at = (video_lanes.index(VIDEO_LANE), lane_density.METRICS.index("count"))
+    sensor, video_sensor, sumo_sensor = make_hybrid_sensor(read_video, SUMO_LANES, video_lanes)
+    state_buf = np.empty((len(sensor.lane_ids), len(FEATURES)), dtype=np.float32)
+    sumo_buf = np.empty((len(sumo_sensor.lane_ids), len(FEATURES)), dtype=np.float32)
     
     sim_step = 0
     decision = 0
     total_reward = 0
     
-    print("Starting hybrid RL control (video + SUMO)...\n")
+    print(f"Starting hybrid RL control (video + SUMO) | pipelined={PIPELINED}...\n")
     
     while sim_step < MAX_STEPS:
-        # Get video density
-        video_density = get_lane_density(cap=video_cap)
-        
-        # Build hybrid state vector
-        state = get_hybrid_state(video_density, SUMO_LANES)
+        # Build hybrid state vector (pipelined: the video part collects
+        # the detection started during the last hold)
+        state = sensor.fill(state_buf).ravel()
+        video_state = video_sensor.last
         
         # RL decision
         action_idx = agent.act(state)
         green_time = ACTIONS[action_idx]
+        if decision == 0:
+            startup.first_decision()
         
         # Change phase
         current_phase = traci.trafficlight.getPhase(tls_id)
         next_phase = (current_phase + 1) % phases
         traci.trafficlight.setPhase(tls_id, next_phase)
         
-        # Hold green for decided duration
-        for _ in range(green_time):
-            if sim_step >= MAX_STEPS:
-                break
-            traci.simulationStep()
-            sim_step += 1
+        # Start the next detection so it runs during the green hold
+        if PIPELINED:
+            density_worker.submit(sim_t=sim_step)
         
-        # Compute reward (negative waiting time)
-        total_queue = sum(traci.lane.getLastStepHaltingNumber(l) for l in SUMO_LANES)
-        total_wait = sum(traci.lane.getWaitingTime(l) for l in SUMO_LANES)
-        reward = -(0.7 * total_queue + 0.3 * total_wait)
+        # Hold green for decided duration (single TraCI call)
+        sim_step, _ = hold_phase(green_time, sim_step, MAX_STEPS)
+        
+        # Compute reward (negative queue + waiting) on the SUMO lanes
+        sumo_sensor.fill(sumo_buf)
+        total_queue = int(sumo_buf[:, QUEUE].sum())
+        reward = float(compute_rewards(sumo_buf, kind="queue_wait"))
         total_reward += reward
         decision += 1
 
         # Get video count for logging
-        video_count = video_density.get(VIDEO_LANE, 0)
-
-        log["step"].append(sim_step)
-        log["green"].append(green_time)
-        log["phase"].append(next_phase)
-        log["queue"].append(
-            sum(traci.lane.getLastStepHaltingNumber(l) for l in SUMO_LANES)
+        video_count = int(video_state[video_count_at])
+
+        log.append(
+            step=sim_step,
+            green=green_time,
+            state=state.copy(),
+            phase=next_phase,
+            queue=total_queue,
+            reward=reward,
+            video_count=video_count,
         )
-        log["reward"].append(reward)
-        log["video_count"].append(video_count)
         
         # Log every 10 decisions
         if decision % 10 == 0:
@@ -170,8 +206,7 @@ def main():
                 f"Queue={total_queue:2d} | Avg_Reward={avg_reward:.2f}"
             )
     
-    video_cap.release()
-    traci.close()
+    startup.close()
     
     print(f"\n✅ Simulation complete!")
     print(f"Total decisions: {decision}")
@@ -180,7 +215,5 @@ def main():
 
 if __name__ == "__main__":
     main()
-os.makedirs("logs", exist_ok=True)
-with open("logs/run_log.pkl", "wb") as f:
-    pickle.dump(log, f)
-print("📁 Logs saved to logs/run_log.pkl")
\ No newline at end of file
+    log.save("logs/run_log.pkl")
+    print("📁 Logs saved to logs/run_log.pkl")
@@ -0,0 +1,242 @@
+"""
+Max-pressure signal control for every intersection in the network.
+
+Each tick, the pressure of a link is (vehicles on its incoming lane) -
+(vehicles on its outgoing lane), and the pressure of a phase is the sum
+over the links it gives green. Every TLS that has held its green for
+min_green seconds switches (through its yellow) to its highest-pressure
+green phase. The links of all intersections live in flat arrays from the
+network index, so one tick is a gather, a bincount and two reduceats
+regardless of network size. No model weights, no inference.
+
+Usage:
+    python control/max_pressure.py
+"""
+import sys
+import subprocess
+import os
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from telemetry import TelemetryWriter
+
+log = TelemetryWriter()
+
+import traci
+import traci.constants as tc
+import numpy as np
+
+from rl.reward import compute_rewards, QUEUE
+from sensors.base import FEATURES
+from sensors.sumo_sensor import SumoBatchSensor, SUBSCRIBED_VARS
+from simulation.network_index import load_network_index, net_file_of
+
+# ============= LANE MAPPING =============
+# Logged queue/reward use the same lanes as the fixed and hybrid
+# controllers (every approach except the camera's), so runs compare
+VIDEO_LANE = "north_in"
+
+# ============= CONFIG =============
+SUMO_BINARY = os.environ.get("SUMO_BINARY", "sumo-gui")
+SUMO_CFG = "simulation/sim.sumocfg"
+PORT = 51825
+
+MIN_GREEN = 10  # seconds before a green may be switched
+MAX_STEPS = 2000
+# Greens are held by the controller, not the programmed durations
+HOLD = 1e6
+
+# ====================================
+
+
+class MaxPressureController:
+    """
+    Vectorized max-pressure over all TLS of a NetworkIndex.
+
+    step(counts) takes vehicle counts in self.lane_ids order and returns
+    the TLS whose phase must change this tick; apply() sends them to SUMO.
+    """
+
+    def __init__(self, index, min_green=MIN_GREEN):
+        m = index.movements
+        self.tls_ids = list(index.tls_ids)
+        self.lane_ids = list(m["lanes"])
+        self.min_green = min_green
+
+        self.link_in = m["link_in"]
+        self.link_out = m["link_out"]
+        self.green_phase = m["green_phase"]
+        self.green_link = m["green_link"]
+        self.green = m["green"]
+        self.next_phase = m["next_phase"]
+        self.yellow_next = m["yellow_next"]
+        self.durations = m["durations"]
+        self.phase_tls = m["phase_tls"]
+        self.phase_offsets = m["phase_offsets"]
+        self.num_phases = len(self.green)
+
+        # Programs start at their first phase
+        self.phase = self.phase_offsets[:-1].copy()
+        self.target = self.phase.copy()
+        self.elapsed = np.zeros(len(self.tls_ids))
+        self.yellow_left = np.zeros(len(self.tls_ids))
+
+    def subscribe(self):
+        """Subscribe every lane on a signal link (counts arrive with each step)."""
+        for lane in self.lane_ids:
+            traci.lane.subscribe(lane, SUBSCRIBED_VARS)
+
+    def read_counts(self):
+        results = traci.lane.getAllSubscriptionResults()
+        return np.fromiter(
+            (results[lane][tc.LAST_STEP_VEHICLE_NUMBER] for lane in self.lane_ids),
+            dtype=np.float64, count=len(self.lane_ids)
+        )
+
+    def pressures(self, counts):
+        """(phases,) pressure of every phase of every TLS; -inf for non-green phases."""
+        link_pressure = counts[self.link_in] - counts[self.link_out]
+        p = np.bincount(self.green_phase, weights=link_pressure[self.green_link],
+                        minlength=self.num_phases)
+        p[~self.green] = -np.inf
+        return p
+
+    def best_phases(self, pressures):
+        """Global index of each TLS's highest-pressure green phase (first on ties)."""
+        starts = self.phase_offsets[:-1]
+        best = np.maximum.reduceat(pressures, starts)
+        candidates = np.where(pressures == best[self.phase_tls],
+                              np.arange(self.num_phases), self.num_phases)
+        return np.minimum.reduceat(candidates, starts)
+
+    def step(self, counts, dt=1.0):
+        """
+        Advance every TLS by dt seconds.
+
+        Returns:
+            (tls positions, global phases) of the TLS to change now
+        """
+        self.elapsed += dt
+        self.yellow_left -= dt
+        changed = np.zeros(len(self.tls_ids), dtype=bool)
+
+        # Yellows that ran out hand over to their target green
+        done = (self.phase != self.target) & (self.yellow_left <= 0)
+        self.phase[done] = self.target[done]
+        self.elapsed[done] = 0
+        changed |= done
+
+        # Greens past min_green move to the max-pressure phase
+        best = self.best_phases(self.pressures(counts))
+        switch = (self.phase == self.target) & (self.elapsed >= self.min_green) & (best != self.phase)
+        via_yellow = switch & self.yellow_next[self.phase]
+        yellow = self.next_phase[self.phase]
+
+        self.target[switch] = best[switch]
+        self.phase = np.where(via_yellow, yellow, np.where(switch, best, self.phase))
+        self.yellow_left[via_yellow] = self.durations[yellow[via_yellow]]
+        self.elapsed[switch] = 0
+        changed |= switch
+
+        tls = np.flatnonzero(changed)
+        return tls, self.phase[tls]
+
+    def apply(self, tls, phases):
+        for t, p in zip(tls, phases):
+            tls_id = self.tls_ids[t]
+            traci.trafficlight.setPhase(tls_id, int(p - self.phase_offsets[t]))
+            if self.green[p]:
+                traci.trafficlight.setPhaseDuration(tls_id, HOLD)
+
+    def local_phase(self, t=0):
+        return int(self.phase[t] - self.phase_offsets[t])
+
+
+def start_sumo():
+    subprocess.Popen([
+        SUMO_BINARY,
+        "-c", SUMO_CFG,
+        "--step-length", "1",
+        "--remote-port", str(PORT)
+    ])
+
+
+def main():
+    index = load_network_index(net_file_of(SUMO_CFG))
+    controller = MaxPressureController(index, MIN_GREEN)
+    tls_id = controller.tls_ids[0]
+
+    start_sumo()
+    traci.init(PORT, numRetries=30)
+
+    controller.subscribe()
+    # Hold the initial greens until the controller decides
+    controller.apply(np.arange(len(controller.tls_ids)), controller.phase)
+
+    log_lanes = [lane for lane in index.controlled_lanes(tls_id) if index.approach[lane] != VIDEO_LANE]
+    sumo_sensor = SumoBatchSensor(log_lanes)
+    sumo_buf = np.empty((len(log_lanes), len(FEATURES)), dtype=np.float32)
+
+    print(f"Connected to SUMO | {len(controller.tls_ids)} TLS | {len(controller.lane_ids)} lanes")
+    print(f"Logged lanes: {log_lanes}")
+    print(f"Min green: {MIN_GREEN}s\n")
+
+    sim_step = 0
+    switches = 0
+    decision = 0
+    total_reward = 0
+    total_queue = 0
+    green_start = 0
+
+    print("Starting MAX-PRESSURE control...\n")
+
+    while sim_step < MAX_STEPS:
+        traci.simulationStep()
+        sim_step += 1
+
+        held_phase = controller.local_phase(0)
+        held_green = controller.green[controller.phase[0]]
+        tls, phases = controller.step(controller.read_counts())
+        controller.apply(tls, phases)
+        switches += len(tls)
+
+        first_changed = len(tls) > 0 and tls[0] == 0
+
+        # One row per green the first TLS ends, like a decision in the
+        # other controllers: the phase it held and for how long
+        if held_green and first_changed:
+            sumo_sensor.fill(sumo_buf)
+            total_queue = int(sumo_buf[:, QUEUE].sum())
+            reward = float(compute_rewards(sumo_buf, kind="queue_wait"))
+            total_reward += reward
+            decision += 1
+            log.append(
+                step=sim_step,
+                green=sim_step - green_start,
+                phase=held_phase,
+                queue=total_queue,
+                reward=reward,
+            )
+        if first_changed and controller.green[controller.phase[0]]:
+            green_start = sim_step
+
+        if sim_step % 100 == 0:
+            print(
+                f"Step {sim_step:4d} | Phase={controller.local_phase(0)} | "
+                f"Switches={switches:4d} | Queue={total_queue:2d} | "
+                f"Avg_Reward={total_reward / max(decision, 1):.2f}"
+            )
+
+    traci.close()
+
+    print(f"\n✅ Max-pressure simulation complete!")
+    print(f"Phase switches: {switches} | Greens logged: {decision}")
+    print(f"Final average reward: {total_reward / max(decision, 1):.2f}")
+
+    log.save("logs/max_pressure_log.pkl")
+    print(f"📊 Logs saved to logs/max_pressure_log.pkl")
+
+
+if __name__ == "__main__":
+    main()
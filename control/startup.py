@@ -0,0 +1,122 @@
+"""
+Fast controller startup.
+
+Heavy dependencies (torch via rl.agent, ultralytics and OpenCV via
+vision) are imported inside the loader functions, which run on worker
+threads while SUMO boots and TraCI connects. Each loader also runs one
+dummy input through its model so the one-time initialization cost is
+paid before the first real decision. Loaders take a `warm` keyword;
+the sequential path passes warm=False.
+
+Environment:
+    LAZY_STARTUP=0       load sequentially after connecting, no warm-up
+    STARTUP_BENCHMARK=1  print startup timings as JSON and exit after
+                         the first decision (benchmarks/startup_benchmark.py)
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Process-relative clock: this module is imported first by the controllers
+T0 = time.perf_counter()
+
+LAZY_STARTUP = os.environ.get("LAZY_STARTUP", "1") == "1"
+STARTUP_BENCHMARK = os.environ.get("STARTUP_BENCHMARK", "0") == "1"
+
+WARMUP_FRAME_SHAPE = (640, 640, 3)
+
+
+def load_policy(state_size, action_size, model_path, warm=True):
+    """Load a greedy DQNAgent and run one dummy forward pass."""
+    from rl.agent import DQNAgent
+
+    agent = DQNAgent(state_size, action_size)
+    agent.load(model_path)
+    agent.epsilon = 0.0
+    if warm:
+        agent.act(np.zeros(state_size, dtype=np.float32))
+    return agent
+
+
+def load_vision(warm=True):
+    """
+    Import the vision stack and load the shared detector.
+
+    Returns:
+        the vision.lane_density module, with its detector loaded
+    """
+    from vision import lane_density
+
+    detector = lane_density.get_detector()
+    if warm:
+        detector.detect_array(np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8))
+    return lane_density
+
+
+class Startup:
+    """
+    Runs loaders in parallel with SUMO startup and records timings.
+
+    Usage:
+        startup = Startup({"policy": lambda warm: load_policy(..., warm=warm)})
+        ... start SUMO, traci.init ...
+        startup.on_close(traci.close)
+        startup.mark("sumo_connected")
+        agent = startup.get("policy")
+        ... control loop ...
+        startup.close()
+
+    Resources registered with on_close (TraCI, capture processes, worker
+    threads) are released in reverse order by close(), which benchmark
+    mode also calls before exiting at the first decision.
+    """
+
+    def __init__(self, loaders):
+        self.loaders = loaders
+        self.timings = {"imports": time.perf_counter() - T0}
+        self._results = {}
+        self._futures = {}
+        self._cleanups = []
+        if LAZY_STARTUP:
+            self._pool = ThreadPoolExecutor(max_workers=max(1, len(loaders)))
+            self._futures = {name: self._pool.submit(fn, warm=True) for name, fn in loaders.items()}
+
+    def mark(self, name):
+        self.timings[name] = time.perf_counter() - T0
+
+    def get(self, name):
+        if name not in self._results:
+            if LAZY_STARTUP:
+                self._results[name] = self._futures[name].result()
+            else:
+                self._results[name] = self.loaders[name](warm=False)
+            self.mark(f"{name}_ready")
+        return self._results[name]
+
+    def on_close(self, fn):
+        """Register a cleanup callable for close()."""
+        self._cleanups.append(fn)
+
+    def close(self):
+        """Run the registered cleanups, newest first."""
+        while self._cleanups:
+            self._cleanups.pop()()
+
+    def first_decision(self):
+        """Record time to first decision; in benchmark mode report and exit."""
+        self.mark("first_decision")
+        if LAZY_STARTUP:
+            self._pool.shutdown(wait=False)
+        print(f"⏱ Cold start to first decision: {self.timings['first_decision']:.2f}s "
+              f"(lazy={LAZY_STARTUP})")
+        if STARTUP_BENCHMARK:
+            try:
+                print("STARTUP " + json.dumps({"lazy": LAZY_STARTUP, **self.timings}), flush=True)
+            finally:
+                # traci.close ends the SUMO server too, so benchmark runs
+                # leave no processes, shared memory or threads behind
+                self.close()
+            raise SystemExit(0)
@@ -8,7 +8,9 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from rl.agent import DQNAgent
-from rl.env_utils import get_controlled_lanes, get_state, compute_reward
+from rl.env_utils import get_state, hold_phase
+from rl.reward import compute_rewards, as_lanes
+from simulation.network_index import load_network_index, net_file_of
 
 SUMO_BINARY = "sumo-gui"  # Use GUI to visualize
 SUMO_CFG = "simulation/sim.sumocfg"
@@ -32,19 +34,18 @@ def main():
     traci.init(51823)
     print("Connected!")
     
-    tls_list = traci.trafficlight.getIDList()
-    if len(tls_list) == 0:
+    index = load_network_index(net_file_of(SUMO_CFG))
+    if len(index.tls_ids) == 0:
         print("ERROR: No traffic lights!")
         traci.close()
         return
     
-    tls_id = tls_list[0]
+    tls_id = index.tls_ids[0]
     print(f"Using traffic light: {tls_id}")
     
-    # Get controlled lanes and phase info
-    lanes = get_controlled_lanes()
-    logic = traci.trafficlight.getAllProgramLogics(tls_id)[0]
-    num_phases = len(logic.phases)
+    # Controlled lanes and phase info from the cached network index
+    lanes = index.controlled_lanes(tls_id)
+    num_phases = index.num_phases(tls_id)
     
     print(f"Controlled lanes: {len(lanes)}")
     print(f"Phases: {num_phases}")
@@ -57,11 +58,8 @@ def main():
     agent.epsilon = 0.0  # No exploration
     print(f"✅ Loaded RL model from {MODEL_PATH}\n")
     
-    # Initialize metrics
-    prev_metrics = {
-        "q": sum(traci.lane.getLastStepHaltingNumber(l) for l in lanes),
-        "w": sum(traci.lane.getWaitingTime(l) for l in lanes)
-    }
+    # Initial state
+    state = get_state(lanes)
     
     sim_step = 0
     decision_count = 0
@@ -70,9 +68,6 @@ def main():
     print("Starting RL control...\n")
     
     while sim_step < 2000:
-        # Get current state
-        state = get_state(lanes)
-        
         # RL decision
         action_idx = agent.act(state)
         green_duration = ACTION_SPACE[action_idx]
@@ -82,22 +77,20 @@ def main():
         next_phase = (current_phase + 1) % num_phases
         traci.trafficlight.setPhase(tls_id, next_phase)
         
-        # Hold green for decided duration
-        for _ in range(green_duration):
-            if sim_step >= 2000:
-                break
-            traci.simulationStep()
-            sim_step += 1
+        # Hold green for decided duration (single TraCI call)
+        sim_step, _ = hold_phase(green_duration, sim_step, 2000)
         
-        # Compute reward
-        reward, prev_metrics = compute_reward(lanes, prev_metrics)
+        # Compute reward from the states before and after the hold
+        next_state = get_state(lanes)
+        reward = float(compute_rewards(as_lanes(next_state), as_lanes(state), kind="delta"))
+        state = next_state
         total_reward += reward
         decision_count += 1
         
         # Log every 10 decisions
         if decision_count % 10 == 0:
             avg_reward = total_reward / decision_count
-            queues = sum(traci.lane.getLastStepHaltingNumber(l) for l in lanes)
+            queues = int(as_lanes(state)[:, 0].sum())
             print(f"Decision {decision_count} | Step {sim_step} | "
                   f"Green={green_duration}s | Queue={queues} | "
                   f"Avg Reward={avg_reward:.1f}")
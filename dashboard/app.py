@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import numpy as np
 import pickle
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from telemetry import TIME_COLUMN, load_summary, rebin, summarize
 
 st.set_page_config(
     page_title="Smart Traffic Signal Dashboard",
@@ -14,119 +20,164 @@ st.set_page_config(
 # -------------------------------
 st.sidebar.title("🚦 Traffic Control Dashboard")
 
+# label -> (log file, display name, script that writes the log, setup note)
+CONTROLLERS = {
+    "RL Controller": (
+        "logs/run_log.pkl", "RL (Hybrid Vision+SUMO)", "hybrid_control.py",
+        "📹 **Hybrid Sensor Setup**: Video (North Lane) + SUMO (East, South, West)"
+    ),
+    "Fixed-Time Controller": (
+        "logs/fixed_control_log.pkl", "Fixed-Time (30s baseline)", "fixed_control.py",
+        "🚦 **Fixed-Time Baseline**: 30s green per phase (standard timing)"
+    ),
+    "Max-Pressure Controller": (
+        "logs/max_pressure_log.pkl", "Max-Pressure (adaptive baseline)", "max_pressure.py",
+        "⚖️ **Max-Pressure Baseline**: highest-pressure phase after a 10s minimum green, all intersections"
+    ),
+}
+COMPARE_RUNS = {"RL": "logs/run_log.pkl", "Max-Pressure": "logs/max_pressure_log.pkl"}
+
 controller = st.sidebar.radio(
     "Select Controller",
-    ["RL Controller", "Fixed-Time Controller"]
+    list(CONTROLLERS)
 )
 
 auto_refresh = st.sidebar.checkbox("Auto refresh", value=False)
 
+compare_interval = st.sidebar.select_slider(
+    "Comparison interval (s)",
+    options=[10, 30, 60, 120, 300],
+    value=30
+)
+
+resolution = st.sidebar.radio(
+    "Queue chart resolution",
+    ["Per row", "Minute", "Hour"]
+)
+
 # -------------------------------
 # Load data
 # -------------------------------
 @st.cache_data
-def load_data_from_pickle(pickle_path):
-    """Load log data from pickle and convert to DataFrame"""
-    try:
+def load_run_summary(pickle_path):
+    """Aggregates and bounded row views precomputed by TelemetryWriter; rebuilt once for older logs"""
+    summary = load_summary(pickle_path)
+    if summary is None or "fine" not in summary["rollups"] or "series" not in summary:
         with open(pickle_path, "rb") as f:
-            log = pickle.load(f)
-        return pd.DataFrame(log)
-    except FileNotFoundError:
+            summary = summarize(pickle.load(f))
+    return summary
+
+@st.cache_data
+def compare_runs(paths, interval):
+    """Re-bin runs' ((name, path) pairs) fine summary rollups onto shared sim-time bins over their common horizon"""
+    summaries = {name: load_run_summary(path) for name, path in paths}
+    if not all(summary["rows"] for summary in summaries.values()):
         return None
+    horizon = min(summary["latest"][TIME_COLUMN] for summary in summaries.values()) + 1
+    return {
+        name: rebin(summary["rollups"]["fine"], interval, ["queue", "reward"], end=horizon)
+        for name, summary in summaries.items()
+    }
 
 # Try to load from pickle
-if controller == "RL Controller":
-    pickle_file = "logs/run_log.pkl"
-    controller_name = "RL (Hybrid Vision+SUMO)"
-else:
-    pickle_file = "logs/fixed_control_log.pkl"
-    controller_name = "Fixed-Time (30s baseline)"
-
-if os.path.exists(pickle_file):
-    df = load_data_from_pickle(pickle_file)
-    if df is None or df.empty:
-        st.error(f"No data in log file. Run `python control/{'hybrid_control.py' if controller == 'RL Controller' else 'fixed_control.py'}` first.")
-        st.stop()
-else:
-    st.error(f"📊 Log file not found. Run `python control/{'hybrid_control.py' if controller == 'RL Controller' else 'fixed_control.py'}` first.")
+pickle_file, controller_name, script, setup_info = CONTROLLERS[controller]
+
+if not os.path.exists(pickle_file):
+    st.error(f"📊 Log file not found. Run `python control/{script}` first.")
     st.stop()
 
-# Add decision counter if not present
-if "decision" not in df.columns:
-    df["decision"] = range(1, len(df) + 1)
+summary = load_run_summary(pickle_file)
+if not summary["rows"]:
+    st.error(f"No data in log file. Run `python control/{script}` first.")
+    st.stop()
+latest = summary["latest"]
 
-latest = df.iloc[-1]
+# Per-row charts use the summary's decimated series (at most a few
+# thousand points) and the tables its tail, never the full log
+df = pd.DataFrame(summary["series"])
+if "decision" not in df.columns:
+    df["decision"] = df["row"]
+tail = pd.DataFrame(summary["tail"])
+if "decision" not in tail.columns:
+    tail["decision"] = tail["row"]
+stride_note = f" (every {summary['series_stride']} rows)" if summary["series_stride"] > 1 else ""
 
 # Display controller info
-if controller == "RL Controller":
-    st.info("📹 **Hybrid Sensor Setup**: Video (North Lane) + SUMO (East, South, West)")
-else:
-    st.info("🚦 **Fixed-Time Baseline**: 30s green per phase (standard timing)")
+st.info(setup_info)
 
 st.title(f"Controller: {controller_name}")
 
 # ================================
 # COMPARISON SECTION
 # ================================
-if os.path.exists("logs/run_log.pkl") and os.path.exists("logs/fixed_control_log.pkl"):
+FIXED_LOG = "logs/fixed_control_log.pkl"
+compared = [(name, path) for name, path in COMPARE_RUNS.items() if os.path.exists(path)]
+COLORS = {"RL": "green", "Max-Pressure": "blue", "Fixed": "red"}
+
+if compared and os.path.exists(FIXED_LOG):
     st.divider()
-    st.subheader("📊 RL vs Fixed-Time Comparison")
+    st.subheader(f"📊 {' / '.join(name for name, _ in compared)} vs Fixed-Time Comparison")
     
-    rl_df = load_data_from_pickle("logs/run_log.pkl")
-    fixed_df = load_data_from_pickle("logs/fixed_control_log.pkl")
+    # The RL log has one row per decision and the other logs one row per
+    # step, so compare all runs on shared sim-time bins rather than by row index
+    aligned = compare_runs(tuple(compared) + (("Fixed", FIXED_LOG),), compare_interval)
     
-    if rl_df is not None and fixed_df is not None:
-        col1, col2, col3 = st.columns(3)
+    if aligned is not None:
+        fixed_bins = aligned["Fixed"]
+        fixed_avg_queue = np.nanmean(fixed_bins["queue"])
+        fixed_avg_reward = np.nanmean(fixed_bins["reward"])
+        # Vehicle-seconds of queueing over the shared horizon
+        fixed_total_wait = np.nansum(fixed_bins["queue"]) * compare_interval
         
-        rl_avg_queue = rl_df["queue"].mean()
-        fixed_avg_queue = fixed_df["queue"].mean()
-        queue_improvement = ((fixed_avg_queue - rl_avg_queue) / fixed_avg_queue * 100) if fixed_avg_queue > 0 else 0
+        for name, _ in compared:
+            bins = aligned[name]
+            col1, col2, col3 = st.columns(3)
+            
+            avg_queue = np.nanmean(bins["queue"])
+            queue_improvement = ((fixed_avg_queue - avg_queue) / fixed_avg_queue * 100) if fixed_avg_queue > 0 else 0
+            
+            avg_reward = np.nanmean(bins["reward"])
+            reward_improvement = ((avg_reward - fixed_avg_reward) / abs(fixed_avg_reward) * 100) if fixed_avg_reward != 0 else 0
+            
+            total_wait = np.nansum(bins["queue"]) * compare_interval
+            wait_reduction = ((fixed_total_wait - total_wait) / fixed_total_wait * 100) if fixed_total_wait > 0 else 0
+            
+            col1.metric(f"Avg Queue ({name})", f"{avg_queue:.2f}", f"-{queue_improvement:.1f}% vs Fixed")
+            col2.metric(f"Avg Reward ({name})", f"{avg_reward:.2f}", f"+{reward_improvement:.1f}% vs Fixed")
+            col3.metric(f"Total Wait Reduction ({name})", f"{wait_reduction:.1f}%",
+                        f"{name} is better" if wait_reduction > 0 else "Fixed is better")
         
-        rl_avg_reward = rl_df["reward"].mean()
-        fixed_avg_reward = fixed_df["reward"].mean()
-        reward_improvement = ((rl_avg_reward - fixed_avg_reward) / abs(fixed_avg_reward) * 100) if fixed_avg_reward != 0 else 0
-        
-        rl_total_wait = rl_df["queue"].sum()
-        fixed_total_wait = fixed_df["queue"].sum()
-        wait_reduction = ((fixed_total_wait - rl_total_wait) / fixed_total_wait * 100) if fixed_total_wait > 0 else 0
-        
-        col1.metric("Avg Queue (RL)", f"{rl_avg_queue:.2f}", f"-{queue_improvement:.1f}% vs Fixed")
-        col2.metric("Avg Reward (RL)", f"{rl_avg_reward:.2f}", f"+{reward_improvement:.1f}% vs Fixed")
-        col3.metric("Total Wait Reduction", f"{wait_reduction:.1f}%", "RL is better")
+        names = [name for name, _ in compared] + ["Fixed"]
         
         # Side-by-side queue comparison
         st.subheader("Queue Length Comparison")
-        comparison_df = pd.DataFrame({
-            "Decision": range(1, min(len(rl_df), len(fixed_df)) + 1),
-            "RL Queue": rl_df["queue"][:min(len(rl_df), len(fixed_df))].values,
-            "Fixed Queue": fixed_df["queue"][:min(len(rl_df), len(fixed_df))].values
-        })
+        comparison_df = pd.DataFrame({"Time (s)": fixed_bins["time"]})
+        for name in names:
+            comparison_df[f"{name} Queue"] = aligned[name]["queue"]
         
         fig_compare_queue = px.line(
             comparison_df,
-            x="Decision",
-            y=["RL Queue", "Fixed Queue"],
-            title="Queue Length: RL vs Fixed-Time",
+            x="Time (s)",
+            y=[f"{name} Queue" for name in names],
+            title=f"Queue Length: {' vs '.join(names)} ({compare_interval}s mean)",
             labels={"value": "Queue Length", "variable": "Controller"},
-            color_discrete_map={"RL Queue": "green", "Fixed Queue": "red"}
+            color_discrete_map={f"{name} Queue": COLORS[name] for name in names}
         )
         st.plotly_chart(fig_compare_queue, use_container_width='stretch')
         
         # Reward comparison
         st.subheader("Reward Comparison")
-        reward_comparison_df = pd.DataFrame({
-            "Decision": range(1, min(len(rl_df), len(fixed_df)) + 1),
-            "RL Reward": rl_df["reward"][:min(len(rl_df), len(fixed_df))].values,
-            "Fixed Reward": fixed_df["reward"][:min(len(rl_df), len(fixed_df))].values
-        })
+        reward_comparison_df = pd.DataFrame({"Time (s)": fixed_bins["time"]})
+        for name in names:
+            reward_comparison_df[f"{name} Reward"] = aligned[name]["reward"]
         
         fig_compare_reward = px.line(
             reward_comparison_df,
-            x="Decision",
-            y=["RL Reward", "Fixed Reward"],
-            title="Reward: RL vs Fixed-Time",
+            x="Time (s)",
+            y=[f"{name} Reward" for name in names],
+            title=f"Reward: {' vs '.join(names)} ({compare_interval}s mean)",
             labels={"value": "Reward", "variable": "Controller"},
-            color_discrete_map={"RL Reward": "green", "Fixed Reward": "red"}
+            color_discrete_map={f"{name} Reward": COLORS[name] for name in names}
         )
         st.plotly_chart(fig_compare_reward, use_container_width='stretch')
 
@@ -188,13 +239,24 @@ st.divider()
 # -------------------------------
 st.subheader("📊 Queue Length Over Time")
 
-fig_queue = px.line(
-    df,
-    x="step",
-    y="queue",
-    title="Total Queue Length",
-    labels={"queue": "Vehicles", "step": "Simulation Step"}
-)
+if resolution == "Per row":
+    fig_queue = px.line(
+        df,
+        x="step",
+        y="queue",
+        title=f"Total Queue Length{stride_note}",
+        labels={"queue": "Vehicles", "step": "Simulation Step"}
+    )
+else:
+    rollup_df = pd.DataFrame(summary["rollups"][resolution.lower()])
+    fig_queue = px.line(
+        rollup_df,
+        x="time",
+        y=["queue_mean", "queue_max"],
+        title=f"Total Queue Length ({resolution.lower()} rollup)",
+        labels={"value": "Vehicles", "time": "Simulation Time (s)", "variable": "Statistic"},
+        markers=True
+    )
 
 st.plotly_chart(fig_queue, use_container_width='stretch')
 
@@ -207,7 +269,7 @@ fig_green = px.line(
     df,
     x="decision",
     y="green",
-    title="Green Time per Decision",
+    title=f"Green Time per Decision{stride_note}",
     labels={"green": "Seconds", "decision": "Decision #"},
     markers=True
 )
@@ -223,7 +285,7 @@ fig_reward = px.line(
     df,
     x="decision",
     y="reward",
-    title="Reward per Decision",
+    title=f"Reward per Decision{stride_note}",
     labels={"reward": "Reward", "decision": "Decision #"}
 )
 
@@ -239,7 +301,7 @@ if "video_count" in df.columns:
         df,
         x="decision",
         y="video_count",
-        title="Vehicles Detected in Video (North Lane)",
+        title=f"Vehicles Detected in Video (North Lane){stride_note}",
         labels={"video_count": "Vehicles", "decision": "Decision #"},
         markers=True
     )
@@ -257,7 +319,7 @@ fig_phase = px.line(
     df,
     x="decision",
     y="phase",
-    title="Traffic Light Phase Over Time",
+    title=f"Traffic Light Phase Over Time{stride_note}",
     labels={"phase": "Phase Number", "decision": "Decision #"},
     markers=True
 )
@@ -265,7 +327,7 @@ fig_phase.update_yaxes(tickvals=[0, 1, 2, 3], ticktext=["NS Green", "NS Yellow",
 st.plotly_chart(fig_phase, use_container_width='stretch')
 
 # Phase distribution (bar chart)
-phase_counts = df["phase"].value_counts().sort_index()
+phase_counts = pd.Series(summary["phase_counts"], dtype=int).sort_index()
 phase_labels = {0: "NS Green", 1: "NS Yellow", 2: "EW Green", 3: "EW Yellow"}
 phase_counts.index = phase_counts.index.map(lambda x: phase_labels.get(x, f"Phase {x}"))
 
@@ -289,19 +351,25 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Queue by Phase")
-    queue_by_phase = df.groupby("phase")["queue"].agg(["mean", "max"])
+    queue_by_phase = pd.DataFrame({
+        phase: {k: stats["queue"][k] for k in ("mean", "max")}
+        for phase, stats in summary["phase_stats"].items()
+    }).T
     queue_by_phase.index = queue_by_phase.index.map(lambda x: phase_labels.get(x, f"Phase {x}"))
     st.dataframe(queue_by_phase, use_container_width=True)
 
 with col2:
     st.subheader("Green Time by Phase")
-    green_by_phase = df.groupby("phase")["green"].agg(["mean", "min", "max"])
+    green_by_phase = pd.DataFrame({
+        phase: {k: stats["green"][k] for k in ("mean", "min", "max")}
+        for phase, stats in summary["phase_stats"].items()
+    }).T
     green_by_phase.index = green_by_phase.index.map(lambda x: phase_labels.get(x, f"Phase {x}"))
     st.dataframe(green_by_phase, use_container_width=True)
 
 # Phase transition table
 st.subheader("Phase Transition Log (Last 20)")
-phase_log = df[["decision", "phase", "green", "queue", "reward"]].tail(20).copy()
+phase_log = tail[["decision", "phase", "green", "queue", "reward"]].copy()
 phase_log["phase"] = phase_log["phase"].map(lambda x: phase_labels.get(x, f"Phase {x}"))
 st.dataframe(phase_log, use_container_width=True)
 
@@ -1,53 +1,106 @@
+import argparse
+import json
+
 import traci, sumolib
 import numpy as np
 from rl.agent import DQNAgent
-from rl.env_utils import get_controlled_lanes, get_state
-
-sumoBinary = sumolib.checkBinary("sumo")
-traci.start([sumoBinary, "-c", "simulation/sim.sumocfg"])
+from rl.env_utils import get_state, subscribe_lanes, hold_phase, to_next_green
+from simulation.network_index import load_network_index, net_file_of
+from simulation.outputs import output_args, load_outputs, summarize
 
-lanes = get_controlled_lanes()
-state_size = len(lanes) * 3
+SUMO_CFG = "simulation/sim.sumocfg"
+OUTPUT_DIR = "logs/eval_outputs"
+MAX_STEPS = 2000
 action_space = [10, 20, 30, 40, 50, 60]
 
-# Get number of phases
-tls = traci.trafficlight.getIDList()[0]
-logic = traci.trafficlight.getAllProgramLogics(tls)[0]
-num_phases = len(logic.phases)
 
-agent = DQNAgent(state_size, len(action_space))
-agent.load("models/dqn_traffic.pt")
-agent.epsilon = 0.0  # No exploration during evaluation
+def run(agent, lanes, tls, greens, durations, track_lanes):
+    """
+    Drive the signal with the agent until MAX_STEPS.
 
-total_wait = 0
-throughput = 0
-MAX_STEPS = 2000
-sim_step = 0
-
-while sim_step < MAX_STEPS:
-    state = get_state(lanes)
-    
-    action = agent.act(state)
-    green = action_space[action]
-    
-    # Change to next phase
-    current_phase = traci.trafficlight.getPhase(tls)
-    traci.trafficlight.setPhase(tls, (current_phase + 1) % num_phases)
-    
-    # Hold phase for green duration
-    for _ in range(green):
-        if sim_step >= MAX_STEPS:
-            break
-        traci.simulationStep()
-        
-        # Collect metrics at each step
-        total_wait += sum(traci.lane.getWaitingTime(l) for l in lanes)
-        throughput += sum(traci.lane.getLastStepVehicleNumber(l) for l in lanes)
-        
-        sim_step += 1
-
-print("RL RESULTS")
-print(f"Avg waiting time: {total_wait / MAX_STEPS:.3f}")
-print(f"Throughput: {throughput}")
-
-traci.close()
\ No newline at end of file
+    With track_lanes, per-step waiting/vehicle totals are collected over
+    TraCI subscriptions; otherwise each green is a single TraCI call.
+    Yellows run as in training (rl.env_utils.to_next_green) and count
+    towards the totals.
+    """
+    total_wait = 0
+    throughput = 0
+    sim_step = 0
+
+    while sim_step < MAX_STEPS:
+        state = get_state(lanes)
+
+        action = agent.act(state)
+        green = action_space[action]
+
+        # Run the yellow, then hold the next green
+        tracked = lanes if track_lanes else None
+        sim_step, yellow = to_next_green(tls, greens, durations, sim_step, MAX_STEPS, green, tracked)
+        sim_step, totals = hold_phase(green, sim_step, MAX_STEPS, tracked)
+        if track_lanes:
+            total_wait += yellow["waiting"] + totals["waiting"]
+            throughput += yellow["vehicles"] + totals["vehicles"]
+
+    return total_wait, throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the trained DQN controller")
+    parser.add_argument("--outputs", action="store_true",
+                        help="measure from SUMO tripinfo/summary/E2 outputs instead of TraCI polling")
+    parser.add_argument("--out-dir", default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    sumoBinary = sumolib.checkBinary("sumo")
+    cmd = [sumoBinary, "-c", SUMO_CFG]
+    # Static layout from the cached network index
+    index = load_network_index(net_file_of(SUMO_CFG))
+    tls = index.tls_ids[0]
+    lanes = index.controlled_lanes(tls)
+    greens = set(index.green_phases(tls))
+    durations = index.tls[tls]["durations"]
+    state_size = len(lanes) * 3
+
+    if args.outputs:
+        cmd += output_args(args.out_dir, lanes)
+    traci.start(cmd)
+
+    if not args.outputs:
+        subscribe_lanes(lanes)
+
+    agent = DQNAgent(state_size, len(action_space))
+    agent.load("models/dqn_traffic.pt")
+    agent.epsilon = 0.0  # No exploration during evaluation
+
+    total_wait, throughput = run(agent, lanes, tls, greens, durations, track_lanes=not args.outputs)
+    traci.close()
+
+    print("RL RESULTS")
+    if not args.outputs:
+        print(f"Avg waiting time: {total_wait / MAX_STEPS:.3f}")
+        print(f"Throughput: {throughput}")
+        return
+
+    metrics = summarize(*load_outputs(args.out_dir))
+    print(f"Trips completed: {metrics['trips']} | Unfinished: {metrics['unfinished']} | "
+          f"Throughput: {metrics['throughput']}")
+    print(
+        f"Waiting  mean={metrics['waiting_mean']:.1f}s p50={metrics['waiting_p50']:.1f}s "
+        f"p95={metrics['waiting_p95']:.1f}s"
+    )
+    print(
+        f"Delay    mean={metrics['delay_mean']:.1f}s p50={metrics['delay_p50']:.1f}s "
+        f"p95={metrics['delay_p95']:.1f}s max={metrics['delay_max']:.1f}s"
+    )
+    for route, tt in sorted(metrics["route_travel_time"].items()):
+        print(f"  {route:32s} travel time {tt:6.1f}s ({metrics['route_trips'][route]} trips)")
+    for lane, q in sorted(metrics.get("lane_mean_queue", {}).items()):
+        print(f"  {lane:16s} mean queue {q:5.2f} | max {metrics['lane_max_queue'][lane]:.0f}")
+
+    with open(f"{args.out_dir}/metrics.json", "w") as f:
+        json.dump(metrics, f, indent=2)
+    print(f"📊 Metrics saved to {args.out_dir}/metrics.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,34 @@
 import traci
 import sumolib
 from metrics import MetricsLogger
+from simulation.network_index import load_network_index
 
 sumoBinary = sumolib.checkBinary("sumo")
 
+# Measured from SUMO's output files, not per-step TraCI polling
+logger = MetricsLogger("logs/fixed_metrics")
+
 traci.start([
     sumoBinary,
     "-c", "simulation/sim.sumocfg",
     "--start"
-])
+] + logger.sumo_args())
 
-logger = MetricsLogger()
+# Signal layout once, from the cached network index
+index = load_network_index()
+tls_id = index.tls_ids[0]
+num_phases = index.num_phases(tls_id)
 
 step = 0
-current_green_end = 0
 FIXED_GREEN = 30  # baseline
 
 while step < 2000:
-    traci.simulationStep()
-    logger.update()
-
-    tls_id = traci.trafficlight.getIDList()[0]
-
-    if step >= current_green_end:
-        phase = traci.trafficlight.getPhase(tls_id)
-        traci.trafficlight.setPhase(tls_id, (phase + 1) % 4)
-        current_green_end = step + FIXED_GREEN
+    phase = traci.trafficlight.getPhase(tls_id)
+    traci.trafficlight.setPhase(tls_id, (phase + 1) % num_phases)
 
-    step += 1
+    # Hold the green in one call
+    step = min(step + FIXED_GREEN, 2000)
+    traci.simulationStep(step)
 
-print("FIXED RESULTS:", logger.results())
 traci.close()
+print("FIXED RESULTS:", logger.results())
@@ -1,29 +1,25 @@
-import traci
-from collections import defaultdict
+from simulation.outputs import output_args, load_outputs, summarize
+
 
 class MetricsLogger:
-    def __init__(self):
-        self.waiting_times = defaultdict(float)
-        self.depart_times = {}
-        self.arrival_times = {}
-        self.passed = 0
+    """
+    Run metrics from SUMO's tripinfo/summary outputs (simulation/outputs.py).
+
+    Nothing is polled during the run: start SUMO with sumo_args(), close
+    TraCI, then call results().
+    """
 
-    def update(self):
-        for veh in traci.vehicle.getIDList():
-            self.waiting_times[veh] += traci.vehicle.getWaitingTime(veh)
+    def __init__(self, out_dir="logs/metrics", lanes=()):
+        self.out_dir = out_dir
+        self.lanes = lanes
 
-        for veh in traci.simulation.getDepartedIDList():
-            self.depart_times[veh] = traci.simulation.getTime()
+    def sumo_args(self):
+        return output_args(self.out_dir, self.lanes)
 
-        for veh in traci.simulation.getArrivedIDList():
-            self.arrival_times[veh] = traci.simulation.getTime()
-            self.passed += 1
+    def summary(self):
+        return summarize(*load_outputs(self.out_dir))
 
     def results(self):
-        avg_wait = sum(self.waiting_times.values()) / max(1, len(self.waiting_times))
-        travel_times = [
-            self.arrival_times[v] - self.depart_times[v]
-            for v in self.arrival_times if v in self.depart_times
-        ]
-        avg_travel = sum(travel_times) / max(1, len(travel_times))
-        return avg_wait, avg_travel, self.passed
+        """(mean waiting time, mean travel time, vehicles arrived)."""
+        metrics = self.summary()
+        return metrics["waiting_mean"], metrics["travel_time_mean"], metrics["throughput"]
@@ -0,0 +1,76 @@
+"""
+Pretrain the DQN on the NumPy queue surrogate (rl/queue_env.py), then
+fine-tune in SUMO with:
+
+    python train_rl.py --init models/dqn_pretrained.pt
+
+Usage:
+    python pretrain_surrogate.py --envs 2048 --iterations 500
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from rl.agent import DQNAgent, set_cpu_threads
+from rl.config import ACTIONS, MAX_STEPS
+from rl.queue_env import QueueEnv
+
+MODEL_PATH = "models/dqn_pretrained.pt"
+
+
+def batch_act(agent, states, rng):
+    """Epsilon-greedy actions for all environments in one forward pass."""
+    with torch.no_grad():
+        q = agent.model(torch.as_tensor(states, dtype=torch.float32, device=agent.device))
+    actions = q.argmax(dim=1).cpu().numpy()
+    explore = rng.random(len(actions)) < agent.epsilon
+    actions[explore] = rng.integers(0, agent.action_size, size=int(explore.sum()))
+    return actions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DQN pretraining on the queue surrogate")
+    parser.add_argument("--envs", type=int, default=1024)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--updates-per-iter", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    set_cpu_threads()
+    env = QueueEnv(num_envs=args.envs, action_space=ACTIONS, max_steps=MAX_STEPS, seed=args.seed)
+    agent = DQNAgent(env.state_size, len(ACTIONS), batch_size=args.batch_size,
+                     updates_per_step=args.updates_per_iter, double_dqn=True)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"Surrogate: {args.envs} envs | lanes={env.lane_ids} | state size {env.state_size}")
+
+    states = env.reset()
+    start = time.time()
+    decisions = 0
+
+    for it in range(args.iterations):
+        actions = batch_act(agent, states, rng)
+        next_states, rewards, dones = env.step(actions)
+
+        agent.remember_batch(states, actions, rewards, next_states)
+        agent.replay()
+
+        # Finished envs were reset inside step(); continue from their fresh state
+        states = env.observe()
+        decisions += args.envs
+
+        if it % 50 == 0:
+            rate = decisions / (time.time() - start)
+            print(f"Iter {it} | epsilon={agent.epsilon:.3f} | "
+                  f"mean reward={rewards.mean():.2f} | {rate:,.0f} decisions/s")
+
+    agent.save(args.model)
+    print(f"✅ Pretrained model saved to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
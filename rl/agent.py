@@ -1,25 +1,46 @@
+import copy
 import os
 import random
 import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-from collections import deque
 from rl.dqn import DQN
+from rl.replay import ReplayBuffer
+
+# Intra-op threads for the small MLP on CPU; more threads only add
+# synchronization overhead at these matrix sizes
+CPU_THREADS = 4
+
+def set_cpu_threads(num_threads=None):
+    """
+    Size torch's intra-op pool for DQNAgent training on CPU.
+
+    The setting is process-wide, so entry points call this once (worker
+    processes that share the cores pass 1) instead of every agent
+    changing it on construction.
+    """
+    if not torch.cuda.is_available():
+        torch.set_num_threads(num_threads or min(CPU_THREADS, os.cpu_count() or 1))
 
 class DQNAgent:
-    def __init__(self, state_size, action_size):
+    def __init__(self, state_size, action_size, gamma=0.99, epsilon=1.0,
+                 epsilon_min=0.05, epsilon_decay=0.995, lr=1e-3, batch_size=64,
+                 updates_per_step=1, double_dqn=False, memory_size=50000):
         self.state_size = state_size
         self.action_size = action_size
 
-        self.gamma = 0.99
-        self.epsilon = 1.0
-        self.epsilon_min = 0.05
-        self.epsilon_decay = 0.995
-        self.lr = 1e-3
-        self.batch_size = 64
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.epsilon_min = epsilon_min
+        self.epsilon_decay = epsilon_decay
+        self.lr = lr
+        self.batch_size = batch_size
+        # Gradient steps per replay() call (one call per decision)
+        self.updates_per_step = updates_per_step
+        self.double_dqn = double_dqn
 
-        self.memory = deque(maxlen=50000)
+        self.memory = ReplayBuffer(memory_size, state_size)
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
         self.model = DQN(state_size, action_size).to(self.device)
@@ -34,27 +55,51 @@ class DQNAgent:
     def act(self, state):
         if np.random.rand() < self.epsilon:
             return random.randrange(self.action_size)
-        state = torch.tensor(state).unsqueeze(0).to(self.device)
+        state = torch.as_tensor(state, dtype=torch.float32, device=self.device).unsqueeze(0)
         with torch.no_grad():
             return torch.argmax(self.model(state)).item()
 
     def remember(self, s, a, r, s_next):
         self.memory.append((s, a, r, s_next))
 
+    def remember_batch(self, states, actions, rewards, next_states):
+        self.memory.extend(states, actions, rewards, next_states)
+
     def replay(self):
         if len(self.memory) < self.batch_size:
             return
 
-        batch = random.sample(self.memory, self.batch_size)
-        states, actions, rewards, next_states = zip(*batch)
+        # Sample every update's batch in one go and move it to the device once
+        n = self.updates_per_step
+        batch = self._to_tensors(*self.memory.sample(n * self.batch_size))
+        for k in range(n):
+            chunk = slice(k * self.batch_size, (k + 1) * self.batch_size)
+            self._update(*(t[chunk] for t in batch))
+
+        if self.epsilon > self.epsilon_min:
+            self.epsilon *= self.epsilon_decay
 
-        states = torch.from_numpy(np.array(states)).float().to(self.device)
-        actions = torch.tensor(actions).unsqueeze(1).to(self.device)
-        rewards = torch.tensor(rewards).to(self.device)
-        next_states = torch.from_numpy(np.array(next_states)).float().to(self.device)
+    def learn(self, states, actions, rewards, next_states):
+        """One gradient step on a given batch (replay memory or offline data)."""
+        return self._update(*self._to_tensors(states, actions, rewards, next_states))
 
-        q = self.model(states).gather(1, actions).squeeze()
-        q_next = self.target(next_states).max(1)[0].detach()
+    def _to_tensors(self, states, actions, rewards, next_states):
+        return (
+            torch.as_tensor(np.asarray(states), dtype=torch.float32, device=self.device),
+            torch.as_tensor(np.asarray(actions), dtype=torch.int64, device=self.device),
+            torch.as_tensor(np.asarray(rewards), dtype=torch.float32, device=self.device),
+            torch.as_tensor(np.asarray(next_states), dtype=torch.float32, device=self.device),
+        )
+
+    def _update(self, states, actions, rewards, next_states):
+        q = self.model(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+        with torch.no_grad():
+            if self.double_dqn:
+                # Online net picks the action, target net scores it
+                next_actions = self.model(next_states).argmax(1, keepdim=True)
+                q_next = self.target(next_states).gather(1, next_actions).squeeze(1)
+            else:
+                q_next = self.target(next_states).max(1)[0]
         target = rewards + self.gamma * q_next
 
         loss = self.loss_fn(q, target)
@@ -62,13 +107,64 @@ class DQNAgent:
         loss.backward()
         self.optimizer.step()
 
-        if self.epsilon > self.epsilon_min:
-            self.epsilon *= self.epsilon_decay
-
         self.step_count += 1
         if self.step_count % 1000 == 0:
             self.target.load_state_dict(self.model.state_dict())
 
+        return loss.item()
+
+    def state_dict(self):
+        """
+        Everything needed to resume training, copied so it can be written
+        from another thread while training continues.
+        """
+        def cpu(sd):
+            return {k: v.detach().cpu().clone() for k, v in sd.items()}
+
+        m = self.memory
+        return {
+            "model": cpu(self.model.state_dict()),
+            "target": cpu(self.target.state_dict()),
+            "optimizer": copy.deepcopy(self.optimizer.state_dict()),
+            "epsilon": self.epsilon,
+            "step_count": self.step_count,
+            "memory": {
+                "states": m.states[:m.size].copy(),
+                "actions": m.actions[:m.size].copy(),
+                "rewards": m.rewards[:m.size].copy(),
+                "next_states": m.next_states[:m.size].copy(),
+                "pos": m.pos,
+                "rng": m.rng.bit_generator.state,
+            },
+            "rng": {
+                "python": random.getstate(),
+                "numpy": np.random.get_state(),
+                "torch": torch.get_rng_state(),
+            },
+        }
+
+    def load_state_dict(self, state):
+        self.model.load_state_dict(state["model"])
+        self.target.load_state_dict(state["target"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        self.epsilon = state["epsilon"]
+        self.step_count = state["step_count"]
+
+        mem = state["memory"]
+        m = self.memory
+        n = len(mem["actions"])
+        m.states[:n] = mem["states"]
+        m.actions[:n] = mem["actions"]
+        m.rewards[:n] = mem["rewards"]
+        m.next_states[:n] = mem["next_states"]
+        m.size = n
+        m.pos = mem["pos"]
+        m.rng.bit_generator.state = mem["rng"]
+
+        random.setstate(state["rng"]["python"])
+        np.random.set_state(state["rng"]["numpy"])
+        torch.set_rng_state(state["rng"]["torch"])
+
     def save(self, path):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         torch.save(self.model.state_dict(), path)
@@ -77,4 +173,4 @@ class DQNAgent:
         self.model.load_state_dict(
         torch.load(path, map_location=self.device)
         )
-        self.model.eval()
\ No newline at end of file
+        self.model.eval()
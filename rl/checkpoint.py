@@ -0,0 +1,89 @@
+import glob
+import os
+import queue
+import re
+import threading
+
+import torch
+
+CHECKPOINT_DIR = "models/checkpoints"
+
+
+class CheckpointWriter:
+    """
+    Writes training checkpoints on a background thread.
+
+    save() takes an already-copied state (DQNAgent.state_dict()) and
+    returns immediately; the thread torch.saves it to a temp file,
+    renames it into place atomically and keeps only the newest `keep`
+    checkpoints. If a write is still running, the next save() waits for
+    it rather than piling up snapshots in memory.
+
+    A failed write (full disk, permissions) doesn't stop the thread: the
+    error is kept and raised from the next save() or close().
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR, keep=3):
+        # [:-keep] would keep everything for keep=0
+        if keep < 1:
+            raise ValueError(f"keep must be at least 1, got {keep}")
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        self._queue = queue.Queue(maxsize=1)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, state, episode):
+        self._raise_error()
+        state = dict(state, episode=episode)
+        self._queue.put(state)
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise RuntimeError("background checkpoint write failed") from error
+
+    def _run(self):
+        while True:
+            state = self._queue.get()
+            if state is None:
+                self._queue.task_done()
+                return
+            try:
+                self._write(state)
+            except Exception as e:
+                print(f"Checkpoint write failed for episode {state['episode']}: {e}")
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _write(self, state):
+        path = os.path.join(self.directory, f"ckpt_{state['episode']:06d}.pt")
+        tmp = path + ".tmp"
+        torch.save(state, tmp)
+        os.replace(tmp, path)
+
+        for old in list_checkpoints(self.directory)[:-self.keep]:
+            os.remove(old)
+
+    def close(self):
+        """Wait for pending writes and stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+
+
+def list_checkpoints(directory=CHECKPOINT_DIR):
+    """Complete checkpoints, oldest first."""
+    paths = glob.glob(os.path.join(directory, "ckpt_*.pt"))
+    return sorted(p for p in paths if re.search(r"ckpt_\d+\.pt$", p))
+
+
+def load_latest(directory=CHECKPOINT_DIR):
+    """Newest checkpoint dict, or None if there is none."""
+    paths = list_checkpoints(directory)
+    if not paths:
+        return None
+    return torch.load(paths[-1], map_location="cpu", weights_only=False)
@@ -0,0 +1,13 @@
+"""
+Training constants shared by the SUMO, surrogate and offline trainers.
+
+Kept free of traci/sumolib imports so trainers that don't run SUMO
+(train_offline.py, pretrain_surrogate.py) don't need it installed.
+"""
+
+SUMO_CFG = "simulation/sim.sumocfg"
+MODEL_PATH = "models/dqn_traffic.pt"
+ACTIONS = [10, 20, 30, 40, 50, 60]
+
+EPISODES = 50
+MAX_STEPS = 2000
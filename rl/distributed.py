@@ -0,0 +1,213 @@
+"""
+Actor-learner DQN training across processes.
+
+Actors each run their own SUMO instance with a local copy of the policy
+and push transition chunks through a torch.multiprocessing queue; the
+tensors travel as shared-memory handles, not pickled arrays. A single
+learner process drains the queue into DQNAgent's replay memory, runs
+gradient updates continuously and publishes new weights into a shared
+model that actors re-sync from every few decisions. The parent process
+supervises both sides (supervise()) so a crashed actor or learner ends
+the run instead of leaving the rest waiting.
+"""
+import queue
+import random
+import time
+
+import numpy as np
+import torch
+
+from rl.agent import DQNAgent, set_cpu_threads
+from rl.dqn import DQN
+
+
+def actor_epsilon(actor_id, num_actors, base=0.4, alpha=7.0):
+    """Per-actor fixed exploration rate (Ape-X schedule)."""
+    if num_actors == 1:
+        return base
+    return base ** (1 + alpha * actor_id / (num_actors - 1))
+
+
+class ActorAgent:
+    """
+    act/remember/replay facade used by train_rl.run_episode in an actor.
+
+    remember() buffers transitions locally; replay() ships full chunks to
+    the learner and re-syncs weights when the shared version moved.
+    """
+
+    def __init__(self, state_size, action_size, shared_model, version, lock,
+                 transitions, epsilon, chunk_size=32, sync_every=10):
+        self.action_size = action_size
+        self.shared_model = shared_model
+        self.version = version
+        self.lock = lock
+        self.transitions = transitions
+        self.epsilon = epsilon
+        self.chunk_size = chunk_size
+        self.sync_every = sync_every
+
+        self.model = DQN(state_size, action_size)
+        self.model.eval()
+        self.local_version = -1
+        self.decisions = 0
+        self._chunk = []
+        self.sync()
+
+    def sync(self):
+        if self.version.value == self.local_version:
+            return
+        with self.lock:
+            self.model.load_state_dict(self.shared_model.state_dict())
+            self.local_version = self.version.value
+
+    def act(self, state):
+        if np.random.rand() < self.epsilon:
+            return random.randrange(self.action_size)
+        with torch.no_grad():
+            q = self.model(torch.from_numpy(np.asarray(state, dtype=np.float32)).unsqueeze(0))
+        return int(q.argmax())
+
+    def remember(self, s, a, r, s_next):
+        self._chunk.append((s, a, r, s_next))
+
+    def flush(self):
+        if not self._chunk:
+            return
+        states, actions, rewards, next_states = zip(*self._chunk)
+        self.transitions.put((
+            torch.from_numpy(np.stack(states).astype(np.float32)),
+            torch.tensor(actions, dtype=torch.int64),
+            torch.tensor(rewards, dtype=torch.float32),
+            torch.from_numpy(np.stack(next_states).astype(np.float32)),
+        ))
+        self._chunk = []
+
+    def replay(self):
+        if len(self._chunk) >= self.chunk_size:
+            self.flush()
+        self.decisions += 1
+        if self.decisions % self.sync_every == 0:
+            self.sync()
+
+
+def run_actor(actor_id, num_actors, episodes, shared_model, version, lock,
+              transitions, stop_event, sumo_cfg, action_space, done):
+    """
+    Actor process: own SUMO, local policy, transitions to the learner.
+
+    done[actor_id] is set just before the end-of-actor sentinel is sent,
+    so supervise() can tell a finished actor from one that died.
+    """
+    # Imported here so the learner process never touches traci
+    import traci
+    from train_rl import run_episode, start_training_sumo
+
+    set_cpu_threads(1)
+    lanes, tls, program = start_training_sumo(sumo_cfg, label=f"actor{actor_id}")
+
+    agent = ActorAgent(
+        len(lanes) * 3, len(action_space), shared_model, version, lock,
+        transitions, actor_epsilon(actor_id, num_actors)
+    )
+
+    for ep in range(episodes):
+        total = run_episode(agent, lanes, tls, program, action_space, sumo_cfg=sumo_cfg)
+        print(f"[actor {actor_id}] Episode {ep} | eps={agent.epsilon:.3f} | "
+              f"reward={total:.1f} | policy v{agent.local_version}")
+
+    agent.flush()
+    traci.close()
+
+    # Tell the learner we're done, then stay alive until it has consumed
+    # our last shared-memory tensors
+    done[actor_id] = 1
+    transitions.put(None)
+    stop_event.wait()
+
+
+def run_learner(state_size, action_size, num_actors, shared_model, version, lock,
+                transitions, stop_event, model_path, publish_every=50):
+    """Learner process: drain transitions, update continuously, publish weights."""
+    set_cpu_threads()
+    agent = DQNAgent(state_size, action_size)
+    agent.model.load_state_dict(shared_model.state_dict())
+    agent.target.load_state_dict(shared_model.state_dict())
+
+    finished = 0
+    updates = 0
+    received = 0
+    start = time.time()
+
+    while finished < num_actors:
+        # Block briefly only while there is nothing to learn from
+        timeout = 0.0 if len(agent.memory) >= agent.batch_size else 0.1
+        try:
+            chunk = transitions.get(timeout=timeout) if timeout else transitions.get_nowait()
+        except queue.Empty:
+            chunk = False
+
+        while chunk is not False:
+            if chunk is None:
+                finished += 1
+            else:
+                agent.remember_batch(*(t.numpy() for t in chunk))
+                received += len(chunk[1])
+                del chunk
+            try:
+                chunk = transitions.get_nowait()
+            except queue.Empty:
+                chunk = False
+
+        if len(agent.memory) < agent.batch_size:
+            continue
+
+        agent.replay()
+        updates += 1
+
+        if updates % publish_every == 0:
+            with lock:
+                shared_model.load_state_dict(agent.model.state_dict())
+                version.value += 1
+
+    elapsed = time.time() - start
+    print(f"[learner] {updates} updates on {received} transitions in {elapsed:.1f}s "
+          f"({updates / max(elapsed, 1e-9):.1f} updates/s)")
+
+    agent.save(model_path)
+    stop_event.set()
+
+
+def supervise(learner, actors, transitions, done, stop_event, poll=1.0):
+    """
+    Wait for the run to finish, from the parent process.
+
+    An actor that exits before setting its done flag (exception, killed)
+    never sends its sentinel, so one is sent on its behalf and the
+    learner finishes with the remaining actors. If the learner dies, the
+    actors are released and stopped.
+
+    Returns:
+        list of actor IDs that failed
+    """
+    failed = []
+    while learner.is_alive():
+        learner.join(poll)
+        for i, p in enumerate(actors):
+            if i in failed or p.is_alive() or done[i]:
+                continue
+            print(f"[supervisor] actor {i} exited with code {p.exitcode} before finishing")
+            failed.append(i)
+            transitions.put(None)
+
+    if learner.exitcode != 0:
+        print(f"[supervisor] learner exited with code {learner.exitcode}, stopping actors")
+        stop_event.set()
+        for p in actors:
+            p.join(poll)
+            if p.is_alive():
+                p.terminate()
+
+    for p in actors:
+        p.join()
+    return failed
@@ -1,9 +1,16 @@
 import traci
+import traci.constants as tc
 import numpy as np
 
-def get_controlled_lanes():
-    tls = traci.trafficlight.getIDList()[0]
-    return list(set(traci.trafficlight.getControlledLanes(tls)))
+from simulation.network_index import NET_FILE, load_network_index
+
+# Lane variables summed over a hold when the caller asks for aggregates
+HOLD_VARS = [tc.VAR_WAITING_TIME, tc.LAST_STEP_VEHICLE_NUMBER]
+
+def get_controlled_lanes(net_file=NET_FILE, tls_id=None):
+    # From the cached network index: sorted, so the state layout is the
+    # same in every process and run, and no TraCI round-trips
+    return load_network_index(net_file).controlled_lanes(tls_id)
 
 def get_state(lanes):
     state = []
@@ -14,18 +21,68 @@ def get_state(lanes):
         state.extend([q, w, f])
     return np.array(state, dtype=np.float32)
 
-def compute_reward(lanes, prev_metrics):
-    total_q = sum(traci.lane.getLastStepHaltingNumber(l) for l in lanes)
-    total_w = sum(traci.lane.getWaitingTime(l) for l in lanes)
-    throughput = sum(traci.lane.getLastStepVehicleNumber(l) for l in lanes)
+def subscribe_lanes(lanes):
+    """Subscribe lanes to HOLD_VARS so hold_phase can aggregate them."""
+    for l in lanes:
+        traci.lane.subscribe(l, HOLD_VARS)
+
+def hold_phase(duration, sim_step, max_steps, lanes=None):
+    """
+    Hold the current phase for `duration` seconds (clipped to max_steps).
+
+    Without lanes the whole hold is one simulationStep(target) call.
+    With lanes (subscribed via subscribe_lanes), waiting time and vehicle
+    count are summed per step from the subscription results that come
+    back with each step, so a second costs one round-trip instead of
+    1 + 2 * len(lanes).
+
+    Returns:
+        (sim_step, totals) with totals = {"waiting": float, "vehicles": int}
+    """
+    steps = min(duration, max_steps - sim_step)
+    totals = {"waiting": 0.0, "vehicles": 0}
+    if steps <= 0:
+        return sim_step, totals
+
+    if lanes is None:
+        traci.simulationStep(sim_step + steps)
+        return sim_step + steps, totals
+
+    for _ in range(steps):
+        traci.simulationStep()
+        for l in lanes:
+            r = traci.lane.getSubscriptionResults(l)
+            totals["waiting"] += r[tc.VAR_WAITING_TIME]
+            totals["vehicles"] += r[tc.LAST_STEP_VEHICLE_NUMBER]
+
+    return sim_step + steps, totals
+
+def to_next_green(tls_id, greens, durations, sim_step, max_steps, hold, lanes=None):
+    """
+    Move tls_id from its current phase to its next green.
 
-    dq = prev_metrics["q"] - total_q
-    dw = prev_metrics["w"] - total_w
+    The transition phases in between (yellows) run for their programmed
+    durations via hold_phase; the green is then set and pinned for
+    `hold` seconds so SUMO doesn't end it at its programmed duration.
+    The caller holds it with hold_phase(hold, ...). rl.queue_env models
+    the same dynamics.
 
-    reward = (
-        0.4 * dw +
-        0.4 * dq +
-        0.2 * throughput
-    )
+    Args:
+        greens: set of the TLS's green phase indexes
+            (NetworkIndex.green_phases)
+        durations: programmed duration of every phase
 
-    return reward, {"q": total_q, "w": total_w}
+    Returns:
+        (sim_step, totals) like hold_phase, totals over the transition
+    """
+    totals = {"waiting": 0.0, "vehicles": 0}
+    phase = (traci.trafficlight.getPhase(tls_id) + 1) % len(durations)
+    while phase not in greens and sim_step < max_steps:
+        traci.trafficlight.setPhase(tls_id, phase)
+        sim_step, part = hold_phase(int(durations[phase]), sim_step, max_steps, lanes)
+        totals["waiting"] += part["waiting"]
+        totals["vehicles"] += part["vehicles"]
+        phase = (phase + 1) % len(durations)
+    traci.trafficlight.setPhase(tls_id, phase)
+    traci.trafficlight.setPhaseDuration(tls_id, hold)
+    return sim_step, totals
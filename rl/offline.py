@@ -0,0 +1,131 @@
+"""
+Offline DQN training from logged controller decisions.
+
+Sources:
+  - controller pickle logs (logs/*.pkl) with per-decision "state",
+    "green" and "reward" columns, as written by hybrid_control
+  - collect_data.py CSVs (f0..fN + green_time); these have no reward
+    column, so rewards are relabelled from consecutive states with
+    rl.reward.compute_rewards
+
+Logged green times must be one of the action space's durations; rows
+with any other green (a different controller's timing, an older action
+space) are dropped rather than snapped to a neighbouring action. Every
+source must have the same state width.
+
+Transitions are written once to a directory of .npy files and opened
+with mmap_mode="r", so sampling a batch only pages in the rows it needs
+and datasets larger than RAM still train.
+"""
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from rl.reward import compute_rewards, as_lanes
+
+ARRAYS = ("states", "actions", "rewards", "next_states")
+
+
+def green_to_action(green, action_space):
+    """
+    Action index of each logged green time.
+
+    Returns:
+        (actions, valid): valid is False where the green is not in
+        action_space (its action is then meaningless)
+    """
+    green = np.asarray(green, dtype=np.float32)
+    actions = np.asarray(action_space, dtype=np.float32)
+    match = np.isclose(green[:, None], actions[None, :])
+    return match.argmax(axis=1), match.any(axis=1)
+
+
+def _consecutive(path, states, actions, valid, rewards):
+    """
+    Row t and t+1 of one run -> (s_t, a_t, r_t, s_t+1), keeping only
+    decisions whose green maps to an action.
+    """
+    keep = valid[:-1]
+    dropped = int((~keep).sum())
+    if dropped:
+        print(f"{path}: dropped {dropped} of {len(keep)} decisions with a green time "
+              f"outside the action space")
+    return states[:-1][keep], actions[:-1][keep], rewards[:-1][keep], states[1:][keep]
+
+
+def load_pickle_log(path, action_space):
+    with open(path, "rb") as f:
+        log = pickle.load(f)
+    if "state" not in log:
+        raise ValueError(f"{path} has no 'state' column; re-run the controller to log states")
+
+    states = np.asarray(log["state"], dtype=np.float32)
+    actions, valid = green_to_action(log["green"], action_space)
+    # Logged reward is observed after the decision in the same row
+    rewards = np.asarray(log["reward"], dtype=np.float32)
+    return _consecutive(path, states, actions, valid, rewards)
+
+
+def load_dataset_csv(path, action_space, reward_kind="delta"):
+    df = pd.read_csv(path)
+    states = df.drop(columns=["green_time"]).to_numpy(dtype=np.float32)
+    actions, valid = green_to_action(df["green_time"].to_numpy(), action_space)
+
+    # Reward of decision t is measured at t+1; relabel all rows at once
+    rewards = np.zeros(len(states), dtype=np.float32)
+    rewards[:-1] = compute_rewards(as_lanes(states[1:]), as_lanes(states[:-1]), kind=reward_kind)
+    return _consecutive(path, states, actions, valid, rewards)
+
+
+def build_offline_dataset(out_dir, action_space, pickle_logs=(), csv_logs=()):
+    """
+    Convert logs into memory-mappable .npy arrays in out_dir.
+
+    Returns:
+        int: number of transitions written
+    """
+    sources = list(pickle_logs) + list(csv_logs)
+    parts = [load_pickle_log(p, action_space) for p in pickle_logs]
+    parts += [load_dataset_csv(p, action_space) for p in csv_logs]
+    if not parts:
+        raise ValueError("No logs given")
+
+    widths = {path: part[0].shape[1] for path, part in zip(sources, parts)}
+    if len(set(widths.values())) > 1:
+        detail = ", ".join(f"{path}: {w}" for path, w in widths.items())
+        raise ValueError(f"Logs have different state sizes ({detail}); train on one layout at a time")
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, column in zip(ARRAYS, zip(*parts)):
+        np.save(os.path.join(out_dir, f"{name}.npy"), np.concatenate(column))
+
+    return sum(len(p[1]) for p in parts)
+
+
+class OfflineDataset:
+    """Memory-mapped transitions written by build_offline_dataset."""
+
+    def __init__(self, data_dir):
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.actions)
+
+    def sample(self, batch_size, rng):
+        # Sorted indices keep the memmap reads mostly sequential
+        idx = np.sort(rng.integers(0, len(self), size=batch_size))
+        return tuple(np.asarray(getattr(self, name)[idx]) for name in ARRAYS)
+
+
+def train_offline(agent, dataset, updates, seed=0, log_every=1000):
+    """Run `updates` gradient steps of agent.learn on the dataset, no simulator."""
+    rng = np.random.default_rng(seed)
+    losses = []
+    for i in range(1, updates + 1):
+        losses.append(agent.learn(*dataset.sample(agent.batch_size, rng)))
+        if i % log_every == 0:
+            print(f"Update {i} | loss={np.mean(losses[-log_every:]):.4f}")
+    return losses
@@ -0,0 +1,205 @@
+"""
+Vectorized queue-model surrogate of the SUMO intersection.
+
+Each controlled lane is a point queue: Poisson arrivals at rates
+calibrated from the route file's <flow> elements, discharge at a
+saturation flow while the current phase gives the lane green. Thousands
+of environments step together as (num_envs, lanes) arrays.
+
+The interface matches the SUMO training loop in train_rl.py: the state
+is [queue, waiting, flow] per lane (lanes in get_controlled_lanes
+order), an action picks a green duration from ACTIONS, the controller
+runs the yellow after the current green for its programmed duration
+(no discharge), then holds the next green for the chosen duration
+(rl.env_utils.to_next_green in SUMO), and the reward is the "delta"
+reward from rl.reward.
+"""
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from rl.reward import compute_rewards, as_lanes
+from simulation.network_index import load_network_index
+
+NET_FILE = "simulation/network.net.xml"
+ROUTE_FILE = "simulation/routes.rou.xml"
+
+
+def read_signal_layout(net_file=NET_FILE, tls_id=None):
+    """
+    Controlled lanes, which of them each phase serves and phase durations.
+
+    Returns:
+        (lanes, served, durations): sorted lane IDs, a (phases, lanes)
+        bool array, True where the phase shows G/g on one of the lane's
+        links, and the programmed (phases,) durations
+    """
+    index = load_network_index(net_file)
+    tls = index.tls[tls_id if tls_id is not None else index.tls_ids[0]]
+    return index.controlled_lanes(tls_id), index.served(tls_id), np.asarray(tls["durations"])
+
+
+def green_transitions(served, durations):
+    """
+    For every phase, the next green phase (cyclically) and the summed
+    programmed duration of the non-green phases in between.
+
+    Returns:
+        (next_green, transition): (phases,) int64 and (phases,) int64
+    """
+    num_phases = len(served)
+    is_green = served.any(axis=1)
+    next_green = np.zeros(num_phases, dtype=np.int64)
+    transition = np.zeros(num_phases, dtype=np.int64)
+    for p in range(num_phases):
+        q = (p + 1) % num_phases
+        while not is_green[q] and q != p:
+            transition[p] += int(durations[q])
+            q = (q + 1) % num_phases
+        next_green[p] = q
+    return next_green, transition
+
+
+def arrival_rates(lanes, route_file=ROUTE_FILE, horizon=3600):
+    """
+    Per-second arrival rate of each lane from the route file's flows.
+
+    A flow's vehicles enter on the first edge of its route and are spread
+    evenly over that edge's controlled lanes.
+
+    The rate comes from the flow's full [begin, end) window; only the
+    part inside the horizon is filled, so the horizon truncates a flow
+    rather than compressing it.
+
+    Returns:
+        np.array (horizon, lanes) float32 in vehicles/second
+    """
+    root = ET.parse(route_file).getroot()
+    routes = {r.get("id"): r.get("edges").split() for r in root.iter("route")}
+    rates = np.zeros((horizon, len(lanes)), dtype=np.float32)
+    expected = 0.0
+
+    for flow in root.iter("flow"):
+        begin = int(float(flow.get("begin", 0)))
+        end = int(float(flow.get("end", horizon)))
+        edges = routes[flow.get("route")] if flow.get("route") else [flow.get("from")]
+        targets = [i for i, lane in enumerate(lanes) if lane.rsplit("_", 1)[0] == edges[0]]
+        if not targets or end <= begin or begin >= horizon:
+            continue
+
+        if flow.get("number") is not None:
+            vehicles = float(flow.get("number"))
+        elif flow.get("vehsPerHour") is not None:
+            vehicles = float(flow.get("vehsPerHour")) * (end - begin) / 3600.0
+        elif flow.get("period") is not None:
+            vehicles = (end - begin) / float(flow.get("period"))
+        else:
+            vehicles = float(flow.get("probability", 0.0)) * (end - begin)
+
+        stop = min(end, horizon)
+        rates[begin:stop, targets] += vehicles / (end - begin) / len(targets)
+        expected += vehicles * (stop - begin) / (end - begin)
+
+    # The rates must reproduce the route file's vehicle count (pro rata
+    # for flows that outlast the horizon)
+    if not np.isclose(rates.sum(dtype=np.float64), expected, rtol=1e-4):
+        raise ValueError(
+            f"{route_file}: arrival rates sum to {rates.sum():.1f} vehicles, "
+            f"route file has {expected:.1f} within {horizon}s"
+        )
+    return rates
+
+
+class QueueEnv:
+    """
+    num_envs independent copies of the intersection.
+
+    Args:
+        saturation_flow: vehicles/second a served lane discharges
+        startup_lost: seconds at the start of each green with no discharge
+        travel_time: seconds to drive the approach; moving vehicles on the
+            lane are estimated as rate * travel_time for the flow feature
+    """
+
+    def __init__(self, num_envs=1024, action_space=(10, 20, 30, 40, 50, 60),
+                 max_steps=2000, net_file=NET_FILE, route_file=ROUTE_FILE,
+                 saturation_flow=0.5, startup_lost=2.0, travel_time=7.0, seed=0):
+        self.num_envs = num_envs
+        self.action_space = np.asarray(action_space, dtype=np.int64)
+        self.max_steps = max_steps
+        self.saturation_flow = saturation_flow
+        self.startup_lost = startup_lost
+        self.travel_time = travel_time
+        self.rng = np.random.default_rng(seed)
+
+        self.lane_ids, self.served, durations = read_signal_layout(net_file)
+        self.next_green, self.transition = green_transitions(self.served, durations)
+        self.rates = arrival_rates(self.lane_ids, route_file, max_steps + int(self.action_space.max()))
+        self.num_phases, self.num_lanes = self.served.shape
+        # Episodes start on the first green, as the program does
+        self.first_green = int(np.flatnonzero(self.served.any(axis=1))[0])
+        self.state_size = self.num_lanes * 3
+
+        self.queue = np.zeros((num_envs, self.num_lanes), dtype=np.float32)
+        self.waiting = np.zeros((num_envs, self.num_lanes), dtype=np.float32)
+        self.phase = np.full(num_envs, self.first_green, dtype=np.int64)
+        self.time = np.zeros(num_envs, dtype=np.int64)
+
+    def observe(self):
+        """Current (num_envs, lanes * 3) states."""
+        t = np.minimum(self.time, len(self.rates) - 1)
+        flow = self.queue + self.rates[t] * self.travel_time
+        return np.stack([self.queue, self.waiting, flow], axis=2).reshape(self.num_envs, -1)
+
+    def _reset_envs(self, mask):
+        self.queue[mask] = 0.0
+        self.waiting[mask] = 0.0
+        self.phase[mask] = self.first_green
+        self.time[mask] = 0
+
+    def reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.observe()
+
+    def step(self, actions):
+        """
+        Args:
+            actions: (num_envs,) indices into action_space
+
+        Returns:
+            (next_states, rewards, dones); finished envs are reset and
+            their next_states are the terminal states
+        """
+        state = self.observe()
+        # Yellow for its programmed duration, then the next green for the
+        # chosen hold (both clipped to the episode)
+        transition = self.transition[self.phase]
+        self.phase = self.next_green[self.phase]
+        served = self.served[self.phase]
+        hold = np.minimum(transition + self.action_space[actions], self.max_steps - self.time)
+
+        # Per-second inner loop over the longest hold, vectorized over envs
+        for s in range(int(hold.max())):
+            active = (s < hold)[:, None]
+            t = np.minimum(self.time + s, len(self.rates) - 1)
+            arrivals = self.rng.poisson(self.rates[t]).astype(np.float32)
+
+            can_leave = served & (s >= transition + self.startup_lost)[:, None]
+            discharge = np.minimum(self.queue, self.saturation_flow) * can_leave
+            # Discharged vehicles take their share of the accumulated wait
+            share = np.divide(discharge, self.queue, out=np.zeros_like(discharge),
+                              where=self.queue > 0)
+
+            self.waiting = np.where(
+                active, (self.waiting + self.queue) * (1.0 - share), self.waiting
+            )
+            self.queue = np.where(active, self.queue - discharge + arrivals, self.queue)
+
+        self.time += hold
+        next_state = self.observe()
+        rewards = compute_rewards(as_lanes(next_state), as_lanes(state), kind="delta")
+
+        dones = self.time >= self.max_steps
+        if dones.any():
+            self._reset_envs(dones)
+        return next_state, rewards, dones
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring buffer of transitions in preallocated arrays.
+
+    Sampling draws all indices with one RNG call and gathers each column
+    with one fancy-indexing op, instead of random.sample over tuples.
+    """
+
+    def __init__(self, capacity, state_size, seed=None):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.pos = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, transition):
+        s, a, r, s_next = transition
+        self.states[self.pos] = s
+        self.actions[self.pos] = a
+        self.rewards[self.pos] = r
+        self.next_states[self.pos] = s_next
+        self.pos = (self.pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, states, actions, rewards, next_states):
+        """Append a batch of transitions at once."""
+        n = len(actions)
+        if n > self.capacity:
+            states, actions, rewards, next_states = (
+                x[-self.capacity:] for x in (states, actions, rewards, next_states)
+            )
+            n = self.capacity
+        idx = (self.pos + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, n):
+        idx = self.rng.integers(0, self.size, size=n)
+        return self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx]
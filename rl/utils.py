@@ -1,5 +1,6 @@
 import numpy as np
 import traci
+from rl.reward import compute_rewards
 
 def get_state(lanes):
     state = []
@@ -14,10 +15,9 @@ def compute_wait(lanes):
     return sum(traci.lane.getWaitingTime(l) for l in lanes)
 
 def compute_reward(prev_wait, curr_wait, arrived, phase_changed):
-    # normalize components
-    wait_term = (prev_wait - curr_wait) / 100.0
-    arrive_term = arrived / 10.0
-    switch_penalty = -0.2 if phase_changed else 0.0
-
-    reward = wait_term + arrive_term + switch_penalty
-    return float(np.clip(reward, -1.0, 1.0))
+    # "normalized" reward from rl.reward on a single pseudo-lane
+    cur = np.array([[0.0, curr_wait, 0.0]], dtype=np.float32)
+    prev = np.array([[0.0, prev_wait, 0.0]], dtype=np.float32)
+    reward = compute_rewards(cur, prev, kind="normalized",
+                             arrived=arrived, phase_changed=phase_changed)
+    return float(reward)
@@ -1,3 +1,9 @@
+import numpy as np
+
+# Column order of the batch sensor arrays
+FEATURES = ["queue", "waiting", "speed"]
+
+
 class LaneSensor:
     def get_metrics(self):
         """
@@ -7,3 +13,62 @@ class LaneSensor:
         speed   : float
         """
         raise NotImplementedError
+
+
+class BatchLaneSensor:
+    """
+    Sensor over many lanes that writes straight into an array.
+
+    Subclasses set self.lane_ids and implement fill(out), which writes
+    a (len(lane_ids), len(FEATURES)) float32 block of queue, waiting,
+    speed in lane_ids order.
+    """
+
+    lane_ids = []
+
+    def fill(self, out):
+        raise NotImplementedError
+
+    def read(self):
+        out = np.empty((len(self.lane_ids), len(FEATURES)), dtype=np.float32)
+        self.fill(out)
+        return out
+
+
+class FusedBatchSensor(BatchLaneSensor):
+    """
+    Mixes several batch sensors per lane.
+
+    Args:
+        lane_ids: output row order
+        sensors: list of BatchLaneSensor; each lane is taken from the
+            first sensor that covers it
+
+    fill() calls every sensor once into its own buffer and scatters the
+    rows with precomputed index arrays, so there is no per-lane Python.
+    """
+
+    def __init__(self, lane_ids, sensors):
+        self.lane_ids = list(lane_ids)
+        self.sensors = []
+        covered = set()
+        for sensor in sensors:
+            src, dst = [], []
+            for row, lane in enumerate(sensor.lane_ids):
+                if lane in self.lane_ids and lane not in covered:
+                    covered.add(lane)
+                    src.append(row)
+                    dst.append(self.lane_ids.index(lane))
+            if src:
+                buf = np.empty((len(sensor.lane_ids), len(FEATURES)), dtype=np.float32)
+                self.sensors.append((sensor, buf, np.array(src), np.array(dst)))
+
+        missing = [l for l in self.lane_ids if l not in covered]
+        if missing:
+            raise ValueError(f"No sensor covers lanes: {missing}")
+
+    def fill(self, out):
+        for sensor, buf, src, dst in self.sensors:
+            sensor.fill(buf)
+            out[dst] = buf[src]
+        return out
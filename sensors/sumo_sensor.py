@@ -1,5 +1,22 @@
 import traci
-from sensors.base import LaneSensor
+import traci.constants as tc
+import numpy as np
+from sensors.base import LaneSensor, BatchLaneSensor
+
+# Also covers rl.env_utils.HOLD_VARS, so hold_phase aggregates keep
+# working on lanes subscribed here
+SUBSCRIBED_VARS = [
+    tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+    tc.VAR_WAITING_TIME,
+    tc.LAST_STEP_MEAN_SPEED,
+    tc.LAST_STEP_VEHICLE_NUMBER,
+]
+# Subscribed variables behind FEATURES (queue, waiting, speed), in order
+FEATURE_VARS = [
+    tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+    tc.VAR_WAITING_TIME,
+    tc.LAST_STEP_MEAN_SPEED,
+]
 
 class SumoLaneSensor(LaneSensor):
     def __init__(self, lane_id):
@@ -11,3 +28,26 @@ class SumoLaneSensor(LaneSensor):
             "waiting": traci.lane.getWaitingTime(self.lane_id),
             "speed": traci.lane.getLastStepMeanSpeed(self.lane_id)
         }
+
+
+class SumoBatchSensor(BatchLaneSensor):
+    """
+    SUMO lanes read from TraCI subscriptions.
+
+    The values arrive with every simulationStep response, so fill() is
+    a local cache read with no extra round-trips: one
+    getAllSubscriptionResults() call unpacked in lane_ids order.
+    """
+
+    def __init__(self, lane_ids):
+        self.lane_ids = list(lane_ids)
+        for lane in self.lane_ids:
+            traci.lane.subscribe(lane, SUBSCRIBED_VARS)
+
+    def fill(self, out):
+        results = traci.lane.getAllSubscriptionResults()
+        out[:] = np.fromiter(
+            (results[lane][var] for lane in self.lane_ids for var in FEATURE_VARS),
+            dtype=np.float32, count=out.size
+        ).reshape(out.shape)
+        return out
@@ -0,0 +1,107 @@
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from sensors.base import BatchLaneSensor, FEATURES
+from vision.detector import VehicleDetector
+from vision.frame_ring import RingCapture
+from vision.frame_source import open_video
+from vision.lane_mapper import get_lane_mapper
+from vision.lane_density import make_tracker
+from vision.motion_gate import MotionGate
+
+
+class VisionSensorArray(BatchLaneSensor):
+    """
+    Many cameras, one detector.
+
+    Each tick reads the next frame of every camera concurrently on a
+    thread pool, runs all frames that pass their motion gate through a
+    single batched forward pass of the shared VehicleDetector, then maps
+    and tracks per camera. Meant for one edge box watching all approaches
+    of an intersection.
+
+    Args:
+        sources: dict {camera_name: video path or device index}; each
+            camera needs an entry in vision/lane_config.json
+        capture_process: decode each camera in its own process and hand
+            frames over through a shared-memory FrameRing
+    """
+
+    def __init__(self, sources, detector=None, motion_gating=True, capture_process=False):
+        self.cameras = list(sources)
+        open_capture = RingCapture if capture_process else open_video
+        self.caps = [open_capture(sources[c]) for c in self.cameras]
+        self.detector = detector or VehicleDetector()
+        self.mappers = [get_lane_mapper(c) for c in self.cameras]
+        self.trackers = [
+            make_tracker(c, getattr(cap, "scale", 1.0)) for c, cap in zip(self.cameras, self.caps)
+        ]
+        self.gates = [MotionGate(m) if motion_gating else None for m in self.mappers]
+        self.fps = [cap.get(cv2.CAP_PROP_FPS) or 30.0 for cap in self.caps]
+        self.frame_idx = [0] * len(self.cameras)
+
+        # (camera, lane) for every row of get_metrics()
+        self.lane_ids = [
+            (c, lane) for c, m in zip(self.cameras, self.mappers) for lane in m.lane_names
+        ]
+        self._offsets = np.cumsum([0] + [len(m.lane_names) for m in self.mappers])
+        self._pool = ThreadPoolExecutor(max_workers=len(self.cameras))
+
+    def _read(self, i):
+        cap = self.caps[i]
+        ret, frame = cap.read()
+        if not ret:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.frame_idx[i] = 0
+            ret, frame = cap.read()
+        t = self.frame_idx[i] / self.fps[i]
+        self.frame_idx[i] += 1
+        return frame, t
+
+    def get_metrics(self, out=None, sim_t=None):
+        """
+        Args:
+            sim_t: simulation time of this tick; trackers accumulate
+                waiting time in it
+
+        Returns:
+            np.array (total_lanes, 3) float32 of queue, waiting, speed,
+            rows ordered as self.lane_ids
+        """
+        if out is None:
+            out = np.empty((len(self.lane_ids), len(FEATURES)), dtype=np.float32)
+
+        frames = list(self._pool.map(self._read, range(len(self.cameras))))
+
+        # Only frames with motion go into the batch
+        boxes = [None] * len(self.cameras)
+        pending = []
+        for i, (frame, _) in enumerate(frames):
+            gate = self.gates[i]
+            if gate is None or gate.should_detect(frame):
+                pending.append(i)
+            else:
+                boxes[i] = gate.boxes
+        detected = self.detector.detect_batch([frames[i][0] for i in pending])
+        for i, b in zip(pending, detected):
+            boxes[i] = b
+            if self.gates[i] is not None:
+                self.gates[i].boxes = b
+
+        for i, (frame, t) in enumerate(frames):
+            mapper = self.mappers[i]
+            in_roi, lane_idx = mapper.assign(boxes[i], frame.shape)
+            self.trackers[i].update(in_roi, lane_idx, t, sim_t)
+            metrics = self.trackers[i].lane_metrics(len(mapper.lane_names))
+            out[self._offsets[i]:self._offsets[i + 1]] = metrics[:, :len(FEATURES)]
+
+        return out
+
+    def fill(self, out):
+        return self.get_metrics(out)
+
+    def release(self):
+        self._pool.shutdown(wait=True)
+        for cap in self.caps:
+            cap.release()
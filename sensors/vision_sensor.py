@@ -1,29 +1,59 @@
 import cv2
-import numpy as np
-from sensors.base import LaneSensor
-from vision.vehicle_detector import VehicleDetector
-from vision.lane_mapper import assign_to_lanes
+from sensors.base import LaneSensor, BatchLaneSensor, FEATURES
+from vision.frame_source import open_video
+from vision.lane_density import compute_lane_state, make_tracker
 
 class VisionLaneSensor(LaneSensor):
-    def __init__(self, video_path, lane_id=0):
-        self.cap = cv2.VideoCapture(video_path)
-        self.detector = VehicleDetector()
+    def __init__(self, video_path, lane_id="north_in", camera="default"):
+        self.cap = open_video(video_path)
         self.lane_id = lane_id
+        self.camera = camera
+        self.tracker = make_tracker(camera, getattr(self.cap, "scale", 1.0))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_idx = 0
 
-    def get_metrics(self):
+    def get_metrics(self, sim_t=None):
         ret, frame = self.cap.read()
         if not ret:
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.frame_idx = 0
             ret, frame = self.cap.read()
 
-        vehicles = self.detector.detect(frame)
-        lane_counts = assign_to_lanes(vehicles)
+        t = self.frame_idx / self.fps
+        self.frame_idx += 1
 
-        count = lane_counts.get(self.lane_id, 0)
+        # Tracked metrics with SUMO lane semantics
+        lane_state = compute_lane_state(frame, t, self.camera, self.tracker, sim_t)
+        metrics = lane_state[self.lane_id]
 
-        # Approximate metrics from vision
         return {
-            "queue": count,
-            "waiting": count * 10.0,
-            "speed": max(1.0, 15.0 - count)
+            "queue": int(metrics["queue"]),
+            "waiting": metrics["waiting"],
+            "speed": metrics["speed"]
         }
+
+
+class VisionBatchSensor(BatchLaneSensor):
+    """
+    Batch view over a per-frame vision function.
+
+    Args:
+        lane_ids: lanes to report, in output order
+        read_fn: callable returning the tracker's (lanes, 4) array of
+            queue, waiting, speed, count, e.g.
+            vision.lane_density.get_lane_metrics or LaneDensityWorker.result
+        lane_names: the camera's lane names, i.e. the array's row order
+
+    The last array read is kept in self.last for logging.
+    """
+
+    def __init__(self, lane_ids, read_fn, lane_names):
+        self.lane_ids = list(lane_ids)
+        self.read_fn = read_fn
+        self.rows = [list(lane_names).index(lane) for lane in self.lane_ids]
+        self.last = None
+
+    def fill(self, out):
+        self.last = self.read_fn()
+        out[:] = self.last[self.rows, :len(FEATURES)]
+        return out
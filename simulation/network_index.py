@@ -0,0 +1,320 @@
+"""
+Static index of the signalised network, built once from the .net.xml.
+
+Maps each traffic light to its phases and the lanes each phase serves,
+and each lane to its approach direction and geometry, so controllers
+get a deterministic lane order without querying TraCI at startup.
+Indexes are pickled under simulation/generated/ keyed by a hash of the
+net file and load in milliseconds. The net is read with sumolib when it
+is installed and with ElementTree otherwise, so NumPy-only tools (the
+queue surrogate) don't need SUMO.
+
+Usage:
+    index = load_network_index("simulation/network.net.xml")
+    lanes = index.controlled_lanes()       # sorted incoming lanes of the first TLS
+    served = index.served()                # (phases, lanes) bool
+    index.approach["north_center_0"]       # "north_in"
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+
+NET_FILE = "simulation/network.net.xml"
+CACHE_DIR = Path(__file__).parent / "generated"
+# Bump when the index layout changes so stale pickles are rebuilt
+INDEX_VERSION = 2
+
+_loaded = {}
+
+
+def approach_of(shape):
+    """
+    Approach name of a lane from its shape: where traffic comes from,
+    "<north|east|south|west>_in" (matching the camera lane names in
+    vision/lane_config.json).
+    """
+    (x0, y0), (x1, y1) = shape[-2], shape[-1]
+    dx, dy = x1 - x0, y1 - y0
+    if abs(dy) >= abs(dx):
+        return "north_in" if dy < 0 else "south_in"
+    return "east_in" if dx < 0 else "west_in"
+
+
+class NetworkIndex:
+    """
+    Attributes:
+        tls_ids: sorted traffic light IDs
+        tls: {tls_id: {"program", "phases" (state strings), "durations",
+            "controlled" (sorted incoming lanes), "served" (phases,
+            controlled) bool, "links" [(in_lane, out_lane, link_index)]}}
+        edge, length, speed, shape, approach: per-lane dicts for every
+            lane on a signal link (incoming and outgoing)
+        movements: the links of all TLS as flat arrays, see
+            build_movements()
+    """
+
+    def __init__(self, net_file, digest):
+        self.net_file = str(net_file)
+        self.digest = digest
+        self.tls_ids = []
+        self.tls = {}
+        self.edge = {}
+        self.length = {}
+        self.speed = {}
+        self.shape = {}
+        self.approach = {}
+        self.movements = None
+
+    def _tls(self, tls_id):
+        return self.tls[tls_id if tls_id is not None else self.tls_ids[0]]
+
+    def controlled_lanes(self, tls_id=None):
+        """Incoming lanes of a TLS in sorted (deterministic) order."""
+        return list(self._tls(tls_id)["controlled"])
+
+    def num_phases(self, tls_id=None):
+        return len(self._tls(tls_id)["phases"])
+
+    def served(self, tls_id=None):
+        """(phases, lanes) bool: True where the phase gives G/g to one of the lane's links."""
+        return self._tls(tls_id)["served"]
+
+    def green_phases(self, tls_id=None):
+        return [p for p, row in enumerate(self.served(tls_id)) if row.any()]
+
+    def lanes_by_approach(self, tls_id=None):
+        """{approach: [lanes]} for a TLS's incoming lanes."""
+        out = {}
+        for lane in self.controlled_lanes(tls_id):
+            out.setdefault(self.approach[lane], []).append(lane)
+        return out
+
+
+def file_digest(path):
+    h = hashlib.sha1(f"v{INDEX_VERSION}".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_net_sumolib(net_file):
+    """
+    (programs, links, lanes) from sumolib:
+        programs: {tls_id: (program_id, [(state, duration)])}
+        links: {tls_id: [(in_lane, out_lane, link_index)]}
+        lanes: {lane_id: (edge, length, speed, shape)} for lanes on a link
+    """
+    import sumolib
+
+    net = sumolib.net.readNet(str(net_file), withPrograms=True)
+    programs, links, lanes = {}, {}, {}
+    for tls in net.getTrafficLights():
+        tls_programs = tls.getPrograms()
+        program_id = sorted(tls_programs)[0]
+        phases = tls_programs[program_id].getPhases()
+        programs[tls.getID()] = (program_id, [(p.state, float(p.duration)) for p in phases])
+        links[tls.getID()] = [(inc.getID(), out.getID(), int(link)) for inc, out, link in tls.getConnections()]
+        for inc, out, _ in tls.getConnections():
+            for lane in (inc, out):
+                lanes[lane.getID()] = (
+                    lane.getEdge().getID(), float(lane.getLength()), float(lane.getSpeed()), lane.getShape()
+                )
+    return programs, links, lanes
+
+
+def _read_net_xml(net_file):
+    """Same as _read_net_sumolib, from the .net.xml with the standard library."""
+    root = ET.parse(net_file).getroot()
+
+    programs = {}
+    for tl in root.iter("tlLogic"):
+        program_id = tl.get("programID")
+        if tl.get("id") in programs and programs[tl.get("id")][0] <= program_id:
+            continue
+        programs[tl.get("id")] = (
+            program_id, [(p.get("state"), float(p.get("duration"))) for p in tl.findall("phase")]
+        )
+
+    links = {tls_id: [] for tls_id in programs}
+    for c in root.iter("connection"):
+        if c.get("tl") in links:
+            links[c.get("tl")].append((
+                f"{c.get('from')}_{c.get('fromLane')}", f"{c.get('to')}_{c.get('toLane')}",
+                int(c.get("linkIndex"))
+            ))
+
+    on_link = {lane for tls_links in links.values() for inc, out, _ in tls_links for lane in (inc, out)}
+    lanes = {}
+    for edge in root.iter("edge"):
+        for lane in edge.iter("lane"):
+            if lane.get("id") in on_link:
+                shape = [tuple(map(float, xy.split(","))) for xy in lane.get("shape").split()]
+                lanes[lane.get("id")] = (
+                    edge.get("id"), float(lane.get("length")), float(lane.get("speed")), shape
+                )
+    return programs, links, lanes
+
+
+def build_network_index(net_file=NET_FILE, digest=None):
+    """Parse the net (sumolib if available, else ElementTree) into a NetworkIndex."""
+    try:
+        programs, links, lanes = _read_net_sumolib(net_file)
+    except ImportError:
+        programs, links, lanes = _read_net_xml(net_file)
+    index = NetworkIndex(net_file, digest or file_digest(net_file))
+
+    for tls_id in sorted(programs):
+        program_id, phases = programs[tls_id]
+        states = [state for state, _ in phases]
+
+        tls_links = sorted(links[tls_id])
+        controlled = sorted({inc for inc, _, _ in tls_links})
+        col = {lane: i for i, lane in enumerate(controlled)}
+        served = np.zeros((len(states), len(controlled)), dtype=bool)
+        for inc, _, link in tls_links:
+            served[:, col[inc]] |= [state[link] in "Gg" for state in states]
+
+        index.tls_ids.append(tls_id)
+        index.tls[tls_id] = {
+            "program": program_id,
+            "phases": states,
+            "durations": [duration for _, duration in phases],
+            "controlled": controlled,
+            "served": served,
+            "links": tls_links,
+        }
+
+        for inc, out, _ in tls_links:
+            for lane_id in (inc, out):
+                if lane_id in index.edge:
+                    continue
+                edge, length, speed, shape = lanes[lane_id]
+                shape = np.asarray(shape, dtype=np.float32)
+                index.edge[lane_id] = edge
+                index.length[lane_id] = length
+                index.speed[lane_id] = speed
+                index.shape[lane_id] = shape
+                index.approach[lane_id] = approach_of(shape)
+
+    index.movements = build_movements(index)
+    return index
+
+
+def build_movements(index):
+    """
+    Every signal link of the network as flat arrays, for controllers that
+    evaluate all intersections in one array operation.
+
+    Phases of all TLS are stacked in tls_ids order, so TLS t owns global
+    phases phase_offsets[t]:phase_offsets[t + 1].
+
+    Returns:
+        dict with
+            lanes: sorted lanes on any link (incoming and outgoing)
+            link_in, link_out: (links,) lane positions of each link
+            phase_tls: (phases,) TLS position of each phase
+            phase_offsets: (tls + 1,) first global phase of each TLS
+            green: (phases,) bool, phase gives G/g to some link and has no yellow
+            next_phase: (phases,) global index of the following phase
+                (wrapping within each TLS program)
+            yellow_next: (phases,) bool, the following phase is a yellow
+                (the transition out of this green)
+            durations: (phases,) programmed durations
+            green_phase, green_link: COO pairs (global phase, link) where
+                the phase gives the link G/g
+    """
+    links = [(t, inc, out, link) for t, tls_id in enumerate(index.tls_ids)
+             for inc, out, link in index.tls[tls_id]["links"]]
+    lanes = sorted({inc for _, inc, _, _ in links} | {out for _, _, out, _ in links})
+    pos = {lane: i for i, lane in enumerate(lanes)}
+
+    phase_offsets = np.cumsum([0] + [index.num_phases(t) for t in index.tls_ids])
+    states = [s for t in index.tls_ids for s in index.tls[t]["phases"]]
+    phase_tls = np.repeat(np.arange(len(index.tls_ids)), np.diff(phase_offsets))
+
+    green_phase, green_link = [], []
+    for l, (t, _, _, link) in enumerate(links):
+        for p in range(phase_offsets[t], phase_offsets[t + 1]):
+            if states[p][link] in "Gg":
+                green_phase.append(p)
+                green_link.append(l)
+
+    has_green = np.array([any(c in "Gg" for c in s) for s in states], dtype=bool)
+    has_yellow = np.array(["y" in s for s in states], dtype=bool)
+    nxt = np.arange(len(states)) + 1
+    nxt[phase_offsets[1:] - 1] = phase_offsets[:-1]  # wrap within each TLS program
+
+    return {
+        "lanes": lanes,
+        "link_in": np.array([pos[inc] for _, inc, _, _ in links], dtype=np.intp),
+        "link_out": np.array([pos[out] for _, _, out, _ in links], dtype=np.intp),
+        "phase_tls": phase_tls,
+        "phase_offsets": phase_offsets,
+        "green": has_green & ~has_yellow,
+        "next_phase": nxt,
+        "yellow_next": has_yellow[nxt] if len(states) else has_yellow,
+        "durations": np.array([d for t in index.tls_ids for d in index.tls[t]["durations"]]),
+        "green_phase": np.array(green_phase, dtype=np.intp),
+        "green_link": np.array(green_link, dtype=np.intp),
+    }
+
+
+def load_network_index(net_file=NET_FILE, cache_dir=CACHE_DIR):
+    """
+    NetworkIndex for net_file, from memory, the on-disk cache, or built
+    (and cached) on first use.
+    """
+    digest = file_digest(net_file)
+    if digest in _loaded:
+        return _loaded[digest]
+
+    path = Path(cache_dir) / f"index_{digest[:16]}.pkl"
+    try:
+        with open(path, "rb") as f:
+            index = pickle.load(f)
+    except (FileNotFoundError, EOFError, AttributeError, pickle.UnpicklingError):
+        index = build_network_index(net_file, digest)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    _loaded[digest] = index
+    return index
+
+
+def net_file_of(sumo_cfg):
+    """net-file of a .sumocfg, resolved relative to the config."""
+    net = ET.parse(sumo_cfg).getroot().find("input/net-file").get("value")
+    return str(Path(sumo_cfg).parent / net)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and print the network index")
+    parser.add_argument("--net", default=NET_FILE)
+    args = parser.parse_args()
+
+    index = load_network_index(args.net)
+    for tls_id in index.tls_ids:
+        print(f"TLS {tls_id} | phases={index.num_phases(tls_id)}")
+        for approach, lanes in sorted(index.lanes_by_approach(tls_id).items()):
+            print(f"  {approach:9s} {lanes}")
+        for p, (state, row) in enumerate(zip(index.tls[tls_id]["phases"], index.served(tls_id))):
+            lanes = [l for l, s in zip(index.controlled_lanes(tls_id), row) if s]
+            print(f"  phase {p} {state} serves {lanes}")
+
+
+if __name__ == "__main__":
+    # Import through the package so cached pickles reference
+    # simulation.network_index.NetworkIndex, not __main__
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent))
+    from simulation.network_index import main
+    main()
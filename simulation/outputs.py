@@ -0,0 +1,200 @@
+"""
+Evaluation from SUMO's own output files.
+
+Instead of polling TraCI every step, SUMO is started with tripinfo,
+summary and lane-area (E2) detector outputs and the XML is streamed
+through iterparse into NumPy arrays after the run. Measurement costs no
+TraCI round-trips and yields per-vehicle delays, per-route travel times
+and per-lane queue statistics.
+
+Usage:
+    args = output_args("logs/eval", lanes)     # extra SUMO command-line args
+    traci.start([sumo, "-c", cfg] + args)
+    ...
+    traci.close()                               # flushes the files
+    metrics = summarize(*load_outputs("logs/eval"))
+"""
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+
+TRIPINFO_FIELDS = ["depart", "arrival", "duration", "waitingTime", "waitingCount",
+                   "timeLoss", "departDelay", "routeLength"]
+SUMMARY_FIELDS = ["time", "running", "waiting", "arrived", "halting",
+                  "meanWaitingTime", "meanTravelTime", "meanSpeed"]
+E2_FIELDS = ["begin", "end", "nVehEntered", "nVehSeen", "meanSpeed", "meanTimeLoss",
+             "meanOccupancy", "meanMaxJamLengthInVehicles", "maxJamLengthInVehicles",
+             "meanHaltingDuration", "meanVehicleNumber"]
+
+TRIPINFO_FILE = "tripinfo.xml"
+SUMMARY_FILE = "summary.xml"
+E2_FILE = "e2.xml"
+DETECTORS_FILE = "e2_detectors.add.xml"
+
+
+def write_e2_detectors(lanes, path, out_file, freq=60):
+    """Lane-area detector covering each whole lane, aggregated every `freq` seconds."""
+    with open(path, "w") as f:
+        f.write("<additional>\n")
+        for lane in lanes:
+            f.write(
+                f'    <laneAreaDetector id="e2_{lane}" lane="{lane}" pos="0" endPos="-1" '
+                f'freq="{freq}" file="{out_file}"/>\n'
+            )
+        f.write("</additional>\n")
+    return path
+
+
+def output_args(out_dir, lanes=(), e2_freq=60):
+    """
+    SUMO command-line arguments that write tripinfo, summary and E2 outputs to out_dir.
+
+    Vehicles still in the network when the run ends are written to
+    tripinfo too (arrival -1), so a controller that strands vehicles
+    doesn't get their delay left out.
+    """
+    out_dir = Path(out_dir).resolve()
+    os.makedirs(out_dir, exist_ok=True)
+    args = [
+        "--tripinfo-output", str(out_dir / TRIPINFO_FILE),
+        "--tripinfo-output.write-unfinished", "true",
+        "--summary-output", str(out_dir / SUMMARY_FILE),
+    ]
+    if lanes:
+        detectors = write_e2_detectors(
+            lanes, out_dir / DETECTORS_FILE, out_dir / E2_FILE, e2_freq
+        )
+        args += ["--additional-files", str(detectors)]
+    return args
+
+
+def _records(path, tag, fields, keys=()):
+    """
+    Stream `tag` elements of an output file into arrays.
+
+    Returns:
+        dict {field: float64 array} (NaN where an attribute is missing)
+        plus {key: str array} for each of `keys`
+    """
+    values = {f: [] for f in fields}
+    labels = {k: [] for k in keys}
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if elem.tag != tag:
+            continue
+        attrib = elem.attrib
+        for f in fields:
+            values[f].append(float(attrib.get(f, "nan")))
+        for k in keys:
+            labels[k].append(attrib.get(k, ""))
+        # Drop parsed elements so memory stays flat on long runs
+        elem.clear()
+
+    out = {f: np.asarray(v, dtype=np.float64) for f, v in values.items()}
+    out.update({k: np.asarray(v) for k, v in labels.items()})
+    return out
+
+
+def _edge(lane_ids):
+    """Lane id -> edge id ("north_center_0" -> "north_center")."""
+    return np.char.rpartition(lane_ids.astype(str), "_")[:, 0]
+
+
+def parse_tripinfo(path):
+    """
+    One row per trip, including unfinished ones (arrival < 0) when SUMO
+    wrote them.
+
+    Adds "route" codes into "routes" (names "<from edge>-><to edge>"), so
+    per-route aggregates are a bincount away.
+    """
+    trips = _records(path, "tripinfo", TRIPINFO_FIELDS, keys=("id", "departLane", "arrivalLane"))
+    if len(trips["id"]):
+        pairs = np.char.add(np.char.add(_edge(trips["departLane"]), "->"), _edge(trips["arrivalLane"]))
+        trips["routes"], trips["route"] = np.unique(pairs, return_inverse=True)
+    else:
+        trips["routes"], trips["route"] = np.asarray([], dtype=str), np.asarray([], dtype=np.intp)
+    return trips
+
+
+def parse_summary(path):
+    """One row per simulation step (network-wide counts)."""
+    return _records(path, "step", SUMMARY_FIELDS)
+
+
+def parse_e2(path):
+    """One row per detector and interval; "lane" codes into "lanes"."""
+    e2 = _records(path, "interval", E2_FIELDS, keys=("id",))
+    lanes = np.char.replace(e2.pop("id").astype(str), "e2_", "", count=1)
+    e2["lanes"], e2["lane"] = np.unique(lanes, return_inverse=True)
+    return e2
+
+
+def load_outputs(out_dir):
+    """(tripinfo, summary, e2) arrays from an output_args() directory; e2 is None without detectors."""
+    out_dir = Path(out_dir)
+    e2_path = out_dir / E2_FILE
+    return (
+        parse_tripinfo(out_dir / TRIPINFO_FILE),
+        parse_summary(out_dir / SUMMARY_FILE),
+        parse_e2(e2_path) if e2_path.exists() else None,
+    )
+
+
+def _distribution(values, prefix):
+    if not len(values):
+        return {f"{prefix}_{k}": float("nan") for k in ("mean", "p50", "p95", "max")}
+    p50, p95 = np.percentile(values, [50, 95])
+    return {
+        f"{prefix}_mean": float(values.mean()),
+        f"{prefix}_p50": float(p50),
+        f"{prefix}_p95": float(p95),
+        f"{prefix}_max": float(values.max()),
+    }
+
+
+def summarize(tripinfo, summary, e2=None):
+    """
+    Run-level metrics.
+
+    Waiting and delay cover every vehicle in tripinfo, unfinished ones
+    included (their time so far); travel times and routes cover finished
+    trips only.
+
+    Returns:
+        dict with trip counts, waiting/delay/travel-time distributions,
+        per-route mean travel time and, with detectors, per-lane queues
+    """
+    finished = tripinfo["arrival"] >= 0
+    metrics = {
+        "trips": int(finished.sum()),
+        "unfinished": int((~finished).sum()),
+        "throughput": int(summary["arrived"][-1]) if len(summary["arrived"]) else 0,
+        "mean_running": float(summary["running"].mean()) if len(summary["running"]) else 0.0,
+        "mean_halting": float(summary["halting"].mean()) if len(summary["halting"]) else 0.0,
+    }
+    metrics.update(_distribution(tripinfo["waitingTime"], "waiting"))
+    metrics.update(_distribution(tripinfo["timeLoss"], "delay"))
+    metrics.update(_distribution(tripinfo["duration"][finished], "travel_time"))
+
+    n_routes = len(tripinfo["routes"])
+    route = tripinfo["route"][finished]
+    counts = np.bincount(route, minlength=n_routes)
+    durations = np.bincount(route, weights=tripinfo["duration"][finished], minlength=n_routes)
+    metrics["route_travel_time"] = {
+        str(r): float(d / c) for r, d, c in zip(tripinfo["routes"], durations, counts) if c
+    }
+    metrics["route_trips"] = {str(r): int(c) for r, c in zip(tripinfo["routes"], counts) if c}
+
+    if e2 is not None and len(e2["lanes"]):
+        n_lanes = len(e2["lanes"])
+        rows = np.bincount(e2["lane"], minlength=n_lanes)
+        jam = np.bincount(e2["lane"], weights=e2["meanMaxJamLengthInVehicles"], minlength=n_lanes)
+        peak = np.zeros(n_lanes)
+        np.maximum.at(peak, e2["lane"], e2["maxJamLengthInVehicles"])
+        metrics["lane_mean_queue"] = {
+            str(l): float(j / max(r, 1)) for l, j, r in zip(e2["lanes"], jam, rows)
+        }
+        metrics["lane_max_queue"] = {str(l): float(p) for l, p in zip(e2["lanes"], peak)}
+    return metrics
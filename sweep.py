@@ -0,0 +1,217 @@
+"""
+Parallel hyperparameter sweep for DQN training.
+
+Each trial trains in its own process with its own SUMO instance, is
+evaluated greedily every --eval-every episodes and is stopped early when
+its score falls below the median of other trials at the same point
+(median stopping rule). Results go to a CSV table; a trial that raises
+is recorded as failed and the sweep goes on.
+
+Search spec (JSON): each key is a DQNAgent argument or "actions"; a
+scalar is a fixed value, a list or {"choice": [...]} a set of choices,
+{"log_uniform": [lo, hi]} / {"uniform": [lo, hi]} a float range and
+{"int_uniform": [lo, hi]} an integer range, bounds included (ranges are
+random search only).
+
+Usage:
+    python sweep.py --spec '{"lr": [1e-3, 3e-4], "gamma": [0.95, 0.99]}'
+    python sweep.py --spec sweep.json --random 32 --workers 8
+"""
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+
+from train_rl import ACTIONS, run_episode, start_training_sumo
+
+AGENT_PARAMS = (
+    "gamma", "epsilon_min", "epsilon_decay", "lr", "batch_size",
+    "updates_per_step", "double_dqn", "memory_size",
+)
+RESULTS_PATH = "logs/sweep_results.csv"
+
+
+class GreedyPolicy:
+    """Evaluation facade for run_episode: no exploration, no learning."""
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def act(self, state):
+        epsilon, self.agent.epsilon = self.agent.epsilon, 0.0
+        try:
+            return self.agent.act(state)
+        finally:
+            self.agent.epsilon = epsilon
+
+    def remember(self, *transition):
+        pass
+
+    def replay(self):
+        pass
+
+
+def _choices(value):
+    """Choices of a list / {"choice": [...]} entry, None for anything else."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict) and "choice" in value:
+        return value["choice"]
+    return None
+
+
+def _sample(value, rng):
+    choices = _choices(value)
+    if choices is not None:
+        return rng.choice(choices)
+    if not isinstance(value, dict):
+        return value
+    if "int_uniform" in value:
+        lo, hi = value["int_uniform"]
+        return rng.randint(int(lo), int(hi))
+    if "log_uniform" in value:
+        lo, hi = value["log_uniform"]
+        return math.exp(rng.uniform(math.log(lo), math.log(hi)))
+    if "uniform" in value:
+        return rng.uniform(*value["uniform"])
+    raise ValueError(f"Bad search spec entry: {value}")
+
+
+def expand_spec(spec, num_random=0, seed=0):
+    """Grid (num_random == 0) or random configurations from a spec."""
+    if num_random:
+        rng = random.Random(seed)
+        return [{k: _sample(v, rng) for k, v in spec.items()} for _ in range(num_random)]
+
+    keys = list(spec)
+    grid = []
+    for k in keys:
+        choices = _choices(spec[k])
+        if choices is None and isinstance(spec[k], dict):
+            raise ValueError(f"Grid search needs a list of choices for {k}")
+        grid.append(choices if choices is not None else [spec[k]])
+    return [dict(zip(keys, combo)) for combo in itertools.product(*grid)]
+
+
+def should_stop(rungs, lock, trial_id, rung, score, min_trials):
+    """Median stopping rule on shared per-rung scores."""
+    with lock:
+        scores = rungs.get(rung, {})
+        others = [s for t, s in scores.items() if t != trial_id]
+        scores[trial_id] = score
+        rungs[rung] = scores  # reassign so the manager sees the update
+    return len(others) >= min_trials and score < statistics.median(others)
+
+
+def run_trial(trial_id, params, episodes, eval_every, rungs, lock, min_trials):
+    import traci
+    from rl.agent import DQNAgent, set_cpu_threads
+
+    # Trials share the machine's cores, one intra-op thread each
+    set_cpu_threads(1)
+    actions = params.get("actions", ACTIONS)
+    lanes, tls, program = start_training_sumo(label=f"trial{trial_id}")
+    scores = []
+    status = "completed"
+    ep = 0
+    # SUMO is up: anything that raises from here on (a bad agent
+    # parameter included) must still close it
+    try:
+        agent = DQNAgent(
+            len(lanes) * 3, len(actions),
+            **{k: params[k] for k in AGENT_PARAMS if k in params}
+        )
+        greedy = GreedyPolicy(agent)
+
+        for ep in range(1, episodes + 1):
+            run_episode(agent, lanes, tls, program, actions)
+            if ep % eval_every == 0:
+                scores.append(run_episode(greedy, lanes, tls, program, actions))
+                if should_stop(rungs, lock, trial_id, len(scores), scores[-1], min_trials):
+                    status = "stopped"
+                    break
+    finally:
+        traci.close()
+    return trial_result(trial_id, params, status, ep, scores)
+
+
+def trial_result(trial_id, params, status, episodes, scores, error=""):
+    return {
+        "trial": trial_id,
+        **{k: json.dumps(v) if isinstance(v, list) else v for k, v in params.items()},
+        "status": status,
+        "episodes": episodes,
+        "final_score": scores[-1] if scores else float("nan"),
+        "best_score": max(scores) if scores else float("nan"),
+        "error": error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel DQN hyperparameter sweep")
+    parser.add_argument("--spec", required=True, help="JSON string or path to a JSON file")
+    parser.add_argument("--random", type=int, default=0, help="random trials (0 = full grid)")
+    parser.add_argument("--episodes", type=int, default=30)
+    parser.add_argument("--eval-every", type=int, default=5)
+    parser.add_argument("--min-trials", type=int, default=3,
+                        help="other trials needed at a rung before stopping early")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    if os.path.exists(args.spec):
+        with open(args.spec) as f:
+            spec = json.load(f)
+    else:
+        spec = json.loads(args.spec)
+    configs = expand_spec(spec, args.random, args.seed)
+    print(f"Sweep: {len(configs)} trials on {args.workers} workers")
+
+    ctx = mp.get_context("spawn")
+    manager = ctx.Manager()
+    rungs = manager.dict()
+    lock = manager.Lock()
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx) as pool:
+        futures = {
+            pool.submit(run_trial, i, cfg, args.episodes, args.eval_every,
+                        rungs, lock, args.min_trials): (i, cfg)
+            for i, cfg in enumerate(configs)
+        }
+        for future in as_completed(futures):
+            try:
+                r = future.result()
+            except Exception as e:
+                i, cfg = futures[future]
+                r = trial_result(i, cfg, "failed", 0, [], error=f"{type(e).__name__}: {e}")
+            results.append(r)
+            print(f"Trial {r['trial']:3d} | {r['status']:9s} | ep={r['episodes']:3d} | "
+                  f"score={r['final_score']:.1f}" + (f" | {r['error']}" if r["error"] else ""))
+
+    # Best first; failed trials (NaN score) last
+    results.sort(key=lambda r: (not math.isnan(r["best_score"]), r["best_score"]), reverse=True)
+    fieldnames = list(dict.fromkeys(k for r in results for k in r))
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+
+    best = results[0]
+    if math.isnan(best["best_score"]):
+        print("\n⚠️ No trial produced a score")
+    else:
+        print(f"\n✅ Best trial {best['trial']} | best score {best['best_score']:.1f}")
+    print(f"📊 Results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
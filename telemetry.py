@@ -0,0 +1,366 @@
+"""
+Time-indexed telemetry for controller runs.
+
+Controllers log at different rates (fixed_control per simulation step,
+hybrid_control per decision). TelemetryStore keeps each run as sorted
+column arrays keyed by simulation time, so runs can be range-queried
+and resampled onto a common interval before they are compared.
+"""
+import os
+import pickle
+from collections import defaultdict
+
+import numpy as np
+
+TIME_COLUMN = "step"
+
+AGGREGATIONS = ("sum", "mean", "last", "max", "min", "count")
+
+
+class TelemetryStore:
+    def __init__(self, columns, time_column=TIME_COLUMN):
+        """
+        Args:
+            columns: dict {name: sequence}, all the same length, one of
+                them being time_column (simulation seconds)
+        """
+        times = np.asarray(columns[time_column], dtype=np.float64)
+        order = np.argsort(times, kind="stable")
+        self.time = times[order]
+        self.columns = {}
+        for name, values in columns.items():
+            if name == time_column:
+                continue
+            values = np.asarray(values)
+            if values.ndim == 1 and len(values) == len(order):
+                self.columns[name] = values[order]
+
+    @classmethod
+    def load(cls, path, time_column=TIME_COLUMN):
+        """Load a controller pickle log (dict of lists)."""
+        with open(path, "rb") as f:
+            log = pickle.load(f)
+        return cls(log, time_column)
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def range(self, start=None, end=None):
+        """Rows with start <= time < end as a new store (views, no copies)."""
+        lo = 0 if start is None else np.searchsorted(self.time, start, side="left")
+        hi = len(self.time) if end is None else np.searchsorted(self.time, end, side="left")
+        sub = TelemetryStore.__new__(TelemetryStore)
+        sub.time = self.time[lo:hi]
+        sub.columns = {k: v[lo:hi] for k, v in self.columns.items()}
+        return sub
+
+    def resample(self, interval, how, start=0.0, end=None, ffill=True):
+        """
+        Aggregate columns into fixed time bins [start + k*interval, ...).
+
+        Args:
+            how: dict {column: "sum" | "mean" | "last" | "max" | "min" | "count"}
+            ffill: carry the previous bin's value into empty bins for
+                "mean", "last", "max" and "min" (sum/count stay 0)
+
+        Returns:
+            dict with "time" (bin start) and one array per requested column
+        """
+        if end is None:
+            end = self.time[-1] + interval if len(self.time) else start
+        n_bins = max(int(np.ceil((end - start) / interval)), 0)
+
+        sub = self.range(start, end)
+        bins = ((sub.time - start) // interval).astype(np.intp)
+        counts = np.bincount(bins, minlength=n_bins)[:n_bins]
+        empty = counts == 0
+
+        out = {"time": start + interval * np.arange(n_bins)}
+        for name, agg in how.items():
+            if agg not in AGGREGATIONS:
+                raise ValueError(f"Unknown aggregation {agg}")
+            values = sub.columns[name].astype(np.float64)
+
+            if agg == "count":
+                out[name] = counts.astype(np.float64)
+                continue
+            if agg == "sum":
+                out[name] = np.bincount(bins, weights=values, minlength=n_bins)[:n_bins]
+                continue
+
+            if agg == "mean":
+                sums = np.bincount(bins, weights=values, minlength=n_bins)[:n_bins]
+                result = sums / np.maximum(counts, 1)
+            elif agg == "last":
+                # Rows are time-sorted, so the last row of each bin is just
+                # before the next bin's first row
+                last_idx = np.searchsorted(bins, np.arange(n_bins), side="right") - 1
+                result = values[np.maximum(last_idx, 0)] if len(values) else np.zeros(n_bins)
+            else:
+                fill = -np.inf if agg == "max" else np.inf
+                result = np.full(n_bins, fill)
+                ufunc = np.maximum if agg == "max" else np.minimum
+                ufunc.at(result, bins, values)
+
+            result = np.where(empty, np.nan, result)
+            if ffill:
+                result = _ffill(result)
+            out[name] = result
+
+        return out
+
+
+def _ffill(values):
+    """Forward-fill NaNs (leading NaNs stay NaN)."""
+    idx = np.where(np.isnan(values), 0, np.arange(len(values)))
+    np.maximum.accumulate(idx, out=idx)
+    return values[idx]
+
+
+def align(stores, interval, how, start=0.0, end=None):
+    """
+    Resample several runs onto the same time bins.
+
+    Args:
+        stores: dict {label: TelemetryStore}
+
+    Returns:
+        dict {label: resampled dict}; every run shares the same "time"
+    """
+    if end is None:
+        end = max((s.time[-1] for s in stores.values() if len(s)), default=start) + interval
+    return {label: s.resample(interval, how, start, end) for label, s in stores.items()}
+
+
+def rebin(rollup, interval, columns, start=0.0, end=None):
+    """
+    Per-bin means of a Rollup.as_dict() over coarser bins, without the rows.
+
+    interval must be a multiple of the rollup's own interval; means are
+    weighted by row count and empty bins carry the previous bin's mean,
+    as resample(..., how="mean") does on the full log.
+
+    Returns:
+        dict with "time" (bin start) and one array per column
+    """
+    time = np.asarray(rollup["time"], dtype=np.float64)
+    if end is None:
+        end = time[-1] + interval if len(time) else start
+    n_bins = max(int(np.ceil((end - start) / interval)), 0)
+
+    keep = (time >= start) & (time < end)
+    bins = ((time[keep] - start) // interval).astype(np.intp)
+    counts = np.bincount(bins, weights=np.asarray(rollup["count"], dtype=np.float64)[keep],
+                         minlength=n_bins)[:n_bins]
+
+    out = {"time": start + interval * np.arange(n_bins)}
+    for c in columns:
+        sums = np.bincount(bins, weights=np.asarray(rollup[f"{c}_sum"], dtype=np.float64)[keep],
+                           minlength=n_bins)[:n_bins]
+        out[c] = _ffill(np.where(counts == 0, np.nan, sums / np.maximum(counts, 1)))
+    return out
+
+
+# ============= WRITER =============
+# Rollup resolutions kept while the controller runs (seconds per bin);
+# "fine" divides every dashboard comparison interval, which rebin()
+# derives from it
+ROLLUPS = {"fine": 10, "minute": 60, "hour": 3600}
+STATS_COLUMNS = ("queue", "green", "reward")
+# Bounded row views kept in the summary for per-row charts and tables
+SERIES_POINTS = 2000
+TAIL_ROWS = 20
+
+
+class RunningStats:
+    """Count/sum/min/max of a stream of values, updated in O(1)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        mean = self.total / self.count if self.count else float("nan")
+        return {"count": self.count, "sum": self.total, "mean": mean, "min": self.min, "max": self.max}
+
+
+class Rollup:
+    """Fixed-interval bins (sum/mean/max per column, last phase) built as rows arrive."""
+
+    def __init__(self, interval, columns=STATS_COLUMNS):
+        self.interval = interval
+        self.stats_columns = columns
+        self.rows = defaultdict(list)
+        self._bin = None
+        self._stats = None
+        self._phase = None
+
+    def add(self, t, values, phase=None):
+        b = int(t // self.interval)
+        if b != self._bin:
+            self._flush()
+            self._bin = b
+            self._stats = {c: RunningStats() for c in self.stats_columns}
+        for c in self.stats_columns:
+            if c in values:
+                self._stats[c].add(values[c])
+        if phase is not None:
+            self._phase = phase
+
+    def _flush(self):
+        if self._bin is None:
+            return
+        self.rows["time"].append(self._bin * self.interval)
+        self.rows["count"].append(max(s.count for s in self._stats.values()))
+        for c, s in self._stats.items():
+            stats = s.as_dict()
+            self.rows[f"{c}_sum"].append(stats["sum"])
+            self.rows[f"{c}_mean"].append(stats["mean"])
+            self.rows[f"{c}_max"].append(stats["max"])
+        self.rows["phase"].append(self._phase)
+
+    def as_dict(self):
+        """Finished bins plus the (partial) current one."""
+        rows = {k: list(v) for k, v in self.rows.items()}
+        if self._bin is not None:
+            pending = Rollup(self.interval, self.stats_columns)
+            pending._bin, pending._stats, pending._phase = self._bin, self._stats, self._phase
+            pending._flush()
+            for k, v in pending.rows.items():
+                rows.setdefault(k, []).extend(v)
+        return rows
+
+
+class TelemetryWriter:
+    """
+    Controller log that keeps its aggregates up to date as rows arrive.
+
+    Rows are stored column-wise like the old defaultdict(list) logs, so
+    log["queue"] and pickled logs keep working. Alongside them the writer
+    maintains overall and per-phase RunningStats, the phase distribution
+    and 10 s/minute/hour rollups, saved next to the log as a small summary the
+    dashboard reads instead of re-aggregating the full run. The summary
+    also holds the last TAIL_ROWS rows and every row decimated to at most
+    SERIES_POINTS, so its size doesn't grow with the run.
+    """
+
+    def __init__(self, time_column=TIME_COLUMN, phase_column="phase",
+                 stats_columns=STATS_COLUMNS, rollups=ROLLUPS):
+        self.time_column = time_column
+        self.phase_column = phase_column
+        self.stats_columns = stats_columns
+        self.columns = defaultdict(list)
+        self.totals = {c: RunningStats() for c in stats_columns}
+        self.phase_stats = defaultdict(lambda: {c: RunningStats() for c in stats_columns})
+        self.phase_counts = defaultdict(int)
+        self.rollups = {name: Rollup(seconds, stats_columns) for name, seconds in rollups.items()}
+
+    def append(self, **values):
+        """Record one row; must include the time column."""
+        for name, value in values.items():
+            self.columns[name].append(value)
+
+        phase = values.get(self.phase_column)
+        if phase is not None:
+            self.phase_counts[phase] += 1
+        for c in self.stats_columns:
+            if c in values:
+                self.totals[c].add(values[c])
+                if phase is not None:
+                    self.phase_stats[phase][c].add(values[c])
+
+        t = values[self.time_column]
+        for rollup in self.rollups.values():
+            rollup.add(t, values, phase)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __setitem__(self, name, values):
+        """Attach a whole column (e.g. a signal joined after the run)."""
+        self.columns[name] = list(values)
+
+    def __len__(self):
+        return len(self.columns[self.time_column])
+
+    def to_dict(self):
+        return dict(self.columns)
+
+    def _rows(self, idx):
+        """Columns at row positions idx, plus 1-based "row" numbers."""
+        n = len(self)
+        out = {"row": [i + 1 for i in idx]}
+        for name, values in self.columns.items():
+            if len(values) == n:
+                out[name] = [values[i] for i in idx]
+        return out
+
+    def series(self, max_points=SERIES_POINTS):
+        """Every stride-th row (and the last) so at most ~max_points remain."""
+        n = len(self)
+        stride = max(1, -(-n // max_points))
+        idx = list(range(0, n, stride))
+        if n and idx[-1] != n - 1:
+            idx.append(n - 1)
+        return self._rows(idx), stride
+
+    def summary(self):
+        latest = {name: values[-1] for name, values in self.columns.items() if values}
+        series, stride = self.series()
+        return {
+            "rows": len(self),
+            "latest": latest,
+            "totals": {c: s.as_dict() for c, s in self.totals.items()},
+            "phase_counts": dict(sorted(self.phase_counts.items())),
+            "phase_stats": {
+                phase: {c: s.as_dict() for c, s in stats.items()}
+                for phase, stats in sorted(self.phase_stats.items())
+            },
+            "rollups": {name: r.as_dict() for name, r in self.rollups.items()},
+            "series": series,
+            "series_stride": stride,
+            "tail": self._rows(range(max(0, len(self) - TAIL_ROWS), len(self))),
+        }
+
+    def save(self, path):
+        """Write the row log to path and the summary to summary_path(path)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self.to_dict(), f)
+        with open(summary_path(path), "wb") as f:
+            pickle.dump(self.summary(), f)
+
+
+def summary_path(log_path):
+    root, ext = os.path.splitext(log_path)
+    return f"{root}_summary{ext or '.pkl'}"
+
+
+def load_summary(log_path):
+    """Summary written by TelemetryWriter.save, or None for older logs."""
+    try:
+        with open(summary_path(log_path), "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def summarize(columns, **writer_kwargs):
+    """Summary for a plain dict-of-lists log written before TelemetryWriter."""
+    writer = TelemetryWriter(**writer_kwargs)
+    names = list(columns)
+    for row in zip(*(columns[n] for n in names)):
+        writer.append(**dict(zip(names, row)))
+    return writer.summary()
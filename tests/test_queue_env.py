@@ -0,0 +1,39 @@
+import numpy as np
+
+from rl.queue_env import QueueEnv
+
+
+def make_env(queue=10.0):
+    env = QueueEnv(num_envs=1, action_space=(10, 20), saturation_flow=0.5, startup_lost=2.0)
+    env.reset()
+    env.rates[:] = 0.0  # deterministic: no arrivals
+    env.queue[:] = queue
+    return env
+
+
+def test_hold_runs_yellow_then_serves_next_green():
+    # As in SUMO (rl.env_utils.to_next_green): from the first green, the
+    # 3 s yellow runs with no discharge, then the next green is served
+    # for the whole chosen hold
+    env = make_env()
+    served_next = env.served[env.next_green[env.first_green]]
+    yellow = int(env.transition[env.first_green])
+    assert yellow == 3
+
+    env.step(np.array([0]))  # 10 s green
+
+    assert env.time[0] == yellow + 10
+    assert env.served[env.phase[0]].any()
+    expected = 10.0 - env.saturation_flow * (10 - env.startup_lost)
+    np.testing.assert_allclose(env.queue[0, served_next], expected)
+    np.testing.assert_allclose(env.queue[0, ~served_next], 10.0)
+
+
+def test_consecutive_holds_alternate_greens():
+    env = make_env()
+    env.step(np.array([1]))
+    env.step(np.array([1]))
+
+    # Every lane has been served by one of the two greens
+    assert (env.queue[0] < 10.0).all()
+    assert env.phase[0] == env.first_green
@@ -0,0 +1,68 @@
+"""
+Actor-learner DQN training (see rl/distributed.py).
+
+Usage:
+    python train_distributed.py --actors 4 --episodes 25
+"""
+import argparse
+
+import torch.multiprocessing as mp
+
+from rl.dqn import DQN
+from rl.distributed import run_actor, run_learner, supervise
+from rl.config import ACTIONS, MODEL_PATH, SUMO_CFG
+from simulation.network_index import load_network_index, net_file_of
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed actor-learner DQN training")
+    parser.add_argument("--actors", type=int, default=max(1, mp.cpu_count() - 1))
+    parser.add_argument("--episodes", type=int, default=50, help="episodes per actor")
+    parser.add_argument("--publish-every", type=int, default=50,
+                        help="learner updates between weight broadcasts")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    # State size from the cached network index, the same layout the actors use
+    lanes = load_network_index(net_file_of(SUMO_CFG)).controlled_lanes()
+    state_size = len(lanes) * 3
+
+    ctx = mp.get_context("spawn")
+    shared_model = DQN(state_size, len(ACTIONS))
+    shared_model.share_memory()
+    version = ctx.Value("i", 0)
+    lock = ctx.Lock()
+    transitions = ctx.Queue(maxsize=1024)
+    stop_event = ctx.Event()
+    done = ctx.Array("b", args.actors)
+
+    learner = ctx.Process(
+        target=run_learner,
+        args=(state_size, len(ACTIONS), args.actors, shared_model, version, lock,
+              transitions, stop_event, args.model, args.publish_every),
+    )
+    actors = [
+        ctx.Process(
+            target=run_actor,
+            args=(i, args.actors, args.episodes, shared_model, version, lock,
+                  transitions, stop_event, SUMO_CFG, ACTIONS, done),
+        )
+        for i in range(args.actors)
+    ]
+
+    print(f"Starting {args.actors} actors + 1 learner...")
+    learner.start()
+    for p in actors:
+        p.start()
+
+    failed = supervise(learner, actors, transitions, done, stop_event)
+    if learner.exitcode != 0:
+        raise SystemExit(f"Learner failed (exit code {learner.exitcode}), model not saved")
+    if failed:
+        print(f"⚠️ Actors {failed} failed; the model was trained without their later episodes")
+
+    print(f"✅ Model saved to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Train DQNAgent from logged decisions without SUMO (see rl/offline.py).
+
+Usage:
+    python train_offline.py --logs logs/run_log.pkl --csv data/dataset.csv
+    python train_offline.py --data data/offline   # reuse converted arrays
+"""
+import argparse
+
+from rl.agent import DQNAgent, set_cpu_threads
+from rl.config import ACTIONS
+from rl.offline import OfflineDataset, build_offline_dataset, train_offline
+
+DATA_DIR = "data/offline"
+MODEL_PATH = "models/dqn_offline.pt"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline DQN training from logs")
+    parser.add_argument("--logs", nargs="*", default=[], help="controller pickle logs")
+    parser.add_argument("--csv", nargs="*", default=[], help="collect_data.py CSVs")
+    parser.add_argument("--data", default=DATA_DIR, help="converted .npy directory")
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--init", default=None, help="start from these weights")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.logs or args.csv:
+        n = build_offline_dataset(args.data, ACTIONS, args.logs, args.csv)
+        print(f"Converted {n} transitions into {args.data}")
+
+    dataset = OfflineDataset(args.data)
+    state_size = dataset.states.shape[1]
+    print(f"Offline dataset: {len(dataset)} transitions | state size {state_size}")
+
+    set_cpu_threads()
+    agent = DQNAgent(state_size, len(ACTIONS))
+    if args.init:
+        agent.load(args.init)
+        agent.target.load_state_dict(agent.model.state_dict())
+        agent.model.train()
+
+    train_offline(agent, dataset, args.updates)
+
+    agent.save(args.model)
+    print(f"✅ Model saved to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
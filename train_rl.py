@@ -1,58 +1,121 @@
+import argparse
 import traci, sumolib
-from rl.agent import DQNAgent
-from rl.env_utils import get_controlled_lanes, get_state, compute_reward
+from rl.agent import DQNAgent, set_cpu_threads
+from rl.env_utils import get_state, hold_phase, to_next_green
+from rl.reward import compute_rewards, as_lanes
+from rl.checkpoint import CheckpointWriter, load_latest, CHECKPOINT_DIR
+from rl.config import SUMO_CFG, MODEL_PATH, ACTIONS, EPISODES, MAX_STEPS
+from simulation.network_index import load_network_index, net_file_of
 
-sumoBinary = sumolib.checkBinary("sumo")
-traci.start([sumoBinary, "-c", "simulation/sim.sumocfg"])
 
-lanes = get_controlled_lanes()
-state_size = len(lanes) * 3
-action_space = [10, 20, 30, 40, 50, 60]
+def run_episode(agent, lanes, tls, program, action_space=ACTIONS,
+                max_steps=MAX_STEPS, sumo_cfg=SUMO_CFG):
+    """
+    Reload SUMO and run one training episode.
 
-agent = DQNAgent(state_size, len(action_space))
+    The agent only needs act/remember/replay, so the same loop drives
+    DQNAgent here and the actor processes in rl.distributed. program is
+    the (greens, durations) pair from start_training_sumo.
 
-EPISODES = 50
-MAX_STEPS = 2000
-
-# Get number of phases once
-tls = traci.trafficlight.getIDList()[0]
-logic = traci.trafficlight.getAllProgramLogics(tls)[0]
-num_phases = len(logic.phases)
-
-for ep in range(EPISODES):
-    traci.load(["-c", "simulation/sim.sumocfg"])
-    
-    # Initialize metrics with actual starting state
-    total_q = sum(traci.lane.getLastStepHaltingNumber(l) for l in lanes)
-    total_w = sum(traci.lane.getWaitingTime(l) for l in lanes)
-    prev_metrics = {"q": total_q, "w": total_w}
+    Returns:
+        float: summed reward over the episode
+    """
+    traci.load(["-c", sumo_cfg])
     
+    state = get_state(lanes)
     sim_step = 0
+    total_reward = 0.0
+    greens, durations = program
     
-    while sim_step < MAX_STEPS:
-        state = get_state(lanes)
-        
+    while sim_step < max_steps:
         action = agent.act(state)
         green = action_space[action]
         
-        # Change to next phase
-        current_phase = traci.trafficlight.getPhase(tls)
-        traci.trafficlight.setPhase(tls, (current_phase + 1) % num_phases)
-        
-        # Hold phase for green duration
-        for _ in range(green):
-            if sim_step >= MAX_STEPS:
-                break
-            traci.simulationStep()
-            sim_step += 1
+        # Run the yellow, then hold the next green (single TraCI call)
+        sim_step, _ = to_next_green(tls, greens, durations, sim_step, max_steps, green)
+        sim_step, _ = hold_phase(green, sim_step, max_steps)
         
-        reward, prev_metrics = compute_reward(lanes, prev_metrics)
+        # Reward from the states we already have, no extra TraCI queries
         next_state = get_state(lanes)
+        reward = float(compute_rewards(as_lanes(next_state), as_lanes(state), kind="delta"))
         
         agent.remember(state, action, reward, next_state)
         agent.replay()
+        state = next_state
+        total_reward += reward
+
+    return total_reward
+
+
+def start_training_sumo(sumo_cfg=SUMO_CFG, label="default"):
+    """
+    Start headless SUMO and read the static TLS layout.
+
+    Returns:
+        (lanes, tls, program) with program = (green phase set, phase durations)
+    """
+    sumoBinary = sumolib.checkBinary("sumo")
+    traci.start([sumoBinary, "-c", sumo_cfg], label=label)
+
+    # Static layout from the cached network index of this config's net
+    index = load_network_index(net_file_of(sumo_cfg))
+    tls = index.tls_ids[0]
+    lanes = index.controlled_lanes(tls)
+    program = (set(index.green_phases(tls)), index.tls[tls]["durations"])
+
+    return lanes, tls, program
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the DQN in SUMO")
+    parser.add_argument("--init", default=None,
+                        help="start from these weights (e.g. surrogate pretraining)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--updates-per-step", type=int, default=1,
+                        help="gradient steps per decision")
+    parser.add_argument("--double-dqn", action="store_true")
+    parser.add_argument("--checkpoint-every", type=int, default=5,
+                        help="episodes between full checkpoints (0 disables)")
+    parser.add_argument("--keep", type=int, default=3, help="checkpoints to keep")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continue from the newest checkpoint in {CHECKPOINT_DIR}")
+    args = parser.parse_args()
+    if args.keep < 1:
+        parser.error("--keep must be at least 1")
+
+    set_cpu_threads()
+    lanes, tls, program = start_training_sumo()
+    state_size = len(lanes) * 3
+
+    agent = DQNAgent(state_size, len(ACTIONS), batch_size=args.batch_size,
+                     updates_per_step=args.updates_per_step, double_dqn=args.double_dqn)
+    if args.init:
+        agent.load(args.init)
+        agent.model.train()
+        agent.target.load_state_dict(agent.model.state_dict())
+
+    start_ep = 0
+    if args.resume:
+        ckpt = load_latest()
+        if ckpt is not None:
+            agent.load_state_dict(ckpt)
+            start_ep = ckpt["episode"] + 1
+            print(f"Resumed from episode {ckpt['episode']} | epsilon={agent.epsilon:.3f}")
+
+    writer = CheckpointWriter(keep=args.keep) if args.checkpoint_every else None
+
+    for ep in range(start_ep, EPISODES):
+        run_episode(agent, lanes, tls, program)
+        print(f"Episode {ep} | epsilon={agent.epsilon:.3f}")
+
+        if writer and (ep + 1) % args.checkpoint_every == 0:
+            writer.save(agent.state_dict(), ep)
+
+    if writer:
+        writer.close()
+    agent.save(MODEL_PATH)
+    traci.close()
 
-    print(f"Episode {ep} | epsilon={agent.epsilon:.3f}")
 
-agent.save("models/dqn_traffic.pt")
-traci.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from ultralytics import YOLO
 import cv2
+import numpy as np
 
 class VehicleDetector:
     def __init__(self, model_path="yolov8n.pt", conf=0.3):
@@ -10,15 +11,26 @@ class VehicleDetector:
         self.vehicle_classes = [2, 3, 5, 7]  
         # car, motorcycle, bus, truck
 
-    def detect(self, frame):
+    def _vehicle_boxes(self, result):
+        cls = result.boxes.cls.cpu().numpy().astype(int)
+        xyxy = result.boxes.xyxy.cpu().numpy()
+        return xyxy[np.isin(cls, self.vehicle_classes)].astype(np.float32)
+
+    def detect_array(self, frame):
+        """Vehicle boxes as a (N, 4) float32 array of x1, y1, x2, y2."""
         results = self.model(frame, conf=self.conf, verbose=False)
-        detections = []
+        boxes = [self._vehicle_boxes(r) for r in results]
 
-        for r in results:
-            for box in r.boxes:
-                cls = int(box.cls[0])
-                if cls in self.vehicle_classes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    detections.append((x1, y1, x2, y2))
+        if not boxes:
+            return np.empty((0, 4), dtype=np.float32)
+        return np.concatenate(boxes)
 
-        return detections
+    def detect_batch(self, frames):
+        """One forward pass over several frames -> list of (N_i, 4) arrays."""
+        if not frames:
+            return []
+        results = self.model(list(frames), conf=self.conf, verbose=False)
+        return [self._vehicle_boxes(r) for r in results]
+
+    def detect(self, frame):
+        return [tuple(int(v) for v in box) for box in self.detect_array(frame)]
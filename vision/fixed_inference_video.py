@@ -2,13 +2,17 @@ import cv2
 from pathlib import Path
 from detector import VehicleDetector
 from lane_mapper import assign_to_lanes
+from frame_source import open_video
 
 VIDEO_PATH = Path(__file__).parent / "test_video.mp4"
 
 FIXED_GREEN = 30  # seconds
 
+# Camera entry in lane_config.json used for lane polygons
+CAMERA = "default"
+
 detector = VehicleDetector()
-cap = cv2.VideoCapture(str(VIDEO_PATH))
+cap = open_video(VIDEO_PATH)
 
 assert cap.isOpened(), "Video not found"
 
@@ -18,7 +22,7 @@ while True:
         break
 
     vehicles = detector.detect(frame)
-    lane_counts = assign_to_lanes(vehicles)
+    lane_counts = assign_to_lanes(vehicles, frame.shape, CAMERA)
 
     y = 30
     for lane, count in lane_counts.items():
@@ -0,0 +1,289 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from vision.frame_source import DETECT_WIDTH, output_geometry
+
+# Header row per slot: (sequence number, frame time in seconds); one extra
+# row holds producer counters (frames written, frames dropped)
+END = -1.0
+_ALIGN = 64
+
+
+def _header_bytes(slots):
+    return -(-(slots + 1) * 2 * 8 // _ALIGN) * _ALIGN
+
+
+class FrameRing:
+    """
+    Single-producer single-consumer ring of fixed-shape frame slots in
+    shared memory.
+
+    The producer decodes straight into slot() and commit()s it; the
+    consumer get()s a view of the oldest filled slot, which stays valid
+    until its next get() or release(). Frames never pass through pickle
+    and are never copied between processes.
+
+    Two semaphores give backpressure: a producer waiting on slot() blocks
+    while all slots are filled, a consumer waiting on get() blocks while
+    all are empty. Sequence numbers are per-ring and increase by one per
+    committed frame, so a consumer can tell how many frames it skipped.
+
+    Create the ring in the parent and pass it to the child process as a
+    Process argument; unpickling attaches to the same shared memory.
+    Only the creating instance unlinks it.
+    """
+
+    def __init__(self, slots, shape, dtype=np.uint8, ctx=None):
+        ctx = ctx or mp.get_context("spawn")
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=_header_bytes(slots) + slots * frame_bytes
+        )
+        self._free = ctx.Semaphore(slots)
+        self._filled = ctx.Semaphore(0)
+        self._owner = True
+        self._map()
+        self.header[:] = 0
+
+    @classmethod
+    def _attach(cls, name, slots, shape, dtype, free, filled):
+        ring = cls.__new__(cls)
+        ring.slots = slots
+        ring.shape = shape
+        ring.dtype = np.dtype(dtype)
+        ring._shm = shared_memory.SharedMemory(name=name)
+        ring._free = free
+        ring._filled = filled
+        ring._owner = False
+        ring._map()
+        return ring
+
+    def __reduce__(self):
+        return (FrameRing._attach, (
+            self._shm.name, self.slots, self.shape, self.dtype.str, self._free, self._filled
+        ))
+
+    def _map(self):
+        buf = self._shm.buf
+        self.header = np.ndarray((self.slots + 1, 2), dtype=np.float64, buffer=buf)
+        self.frames = np.ndarray((self.slots,) + self.shape, dtype=self.dtype,
+                                 buffer=buf, offset=_header_bytes(self.slots))
+        # Process-local cursors: one process writes, one reads
+        self._write = 0
+        self._read = 0
+        self._seq = 0
+        self._acquired = False
+        self._held = False
+
+    # ---------- producer ----------
+    def slot(self, block=True, timeout=None):
+        """
+        Writable view of the next free slot, or None if none frees up in
+        time. Calling it again before commit() returns the same slot.
+        """
+        if not self._acquired:
+            if not self._free.acquire(block, timeout):
+                return None
+            self._acquired = True
+        return self.frames[self._write]
+
+    def commit(self, t=0.0):
+        """Publish the slot returned by slot() with frame time t."""
+        self.header[self._write] = (self._seq, t)
+        self.header[self.slots, 0] = self._seq + 1
+        self._seq += 1
+        self._write = (self._write + 1) % self.slots
+        self._acquired = False
+        self._filled.release()
+
+    def put(self, frame, t=0.0, block=True, timeout=None):
+        """Copy frame into the ring. Returns False if it was dropped."""
+        out = self.slot(block, timeout)
+        if out is None:
+            self.drop()
+            return False
+        np.copyto(out, frame)
+        self.commit(t)
+        return True
+
+    def drop(self):
+        """Count a frame the producer skipped because the ring was full."""
+        self.header[self.slots, 1] += 1
+
+    def put_end(self, timeout=None):
+        """Tell the consumer no more frames follow."""
+        if self.slot(timeout=timeout) is None:
+            return False
+        self.header[self._write] = (END, 0.0)
+        self._write = (self._write + 1) % self.slots
+        self._acquired = False
+        self._filled.release()
+        return True
+
+    # ---------- consumer ----------
+    def get(self, block=True, timeout=None):
+        """
+        Oldest filled slot as (seq, t, frame view).
+
+        Returns None at end of stream; raises TimeoutError if nothing
+        arrives in time. Releases the previously returned slot first.
+        """
+        self.release()
+        if not self._filled.acquire(block, timeout):
+            raise TimeoutError("no frame in ring")
+        seq, t = self.header[self._read]
+        self._held = True
+        if seq == END:
+            self.release()
+            return None
+        return int(seq), float(t), self.frames[self._read]
+
+    def release(self):
+        """Hand the slot returned by get() back to the producer."""
+        if self._held:
+            self._held = False
+            self._read = (self._read + 1) % self.slots
+            self._free.release()
+
+    @property
+    def written(self):
+        return int(self.header[self.slots, 0])
+
+    @property
+    def dropped(self):
+        return int(self.header[self.slots, 1])
+
+    def close(self):
+        """Detach from the shared memory (and free it if this process created it)."""
+        # Views must go before the mapping can close; a frame the caller
+        # still holds keeps it mapped until that view is dropped
+        del self.header, self.frames
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+        if self._owner:
+            self._shm.unlink()
+
+
+def capture_worker(ring, source, stop, loop=True, block=True, width=None):
+    """
+    Capture process: decode `source` into `ring` until stopped.
+
+    With block=True every frame is delivered and decoding waits for the
+    consumer (files). With block=False frames arriving while the ring is
+    full are grabbed without decoding and counted as dropped (live
+    cameras).
+    """
+    import cv2
+    from vision.frame_source import open_video
+
+    cap = open_video(source, width)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_idx = 0
+    try:
+        while not stop.is_set():
+            slot = ring.slot(timeout=0.1) if block else ring.slot(block=False)
+            if slot is None:
+                if block:
+                    continue
+                # Ring full: advance the stream without decoding
+                if cap.grab():
+                    ring.drop()
+                    frame_idx += 1
+                    continue
+            else:
+                ret, frame = cap.read(slot)
+                if ret:
+                    if not np.may_share_memory(frame, slot):
+                        # Decoder allocated its own buffer (e.g. odd strides)
+                        np.copyto(slot, frame)
+                    ring.commit(frame_idx / fps)
+                    frame_idx += 1
+                    continue
+
+            # End of stream
+            if loop and cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                frame_idx = 0
+                continue
+            break
+    finally:
+        cap.release()
+        if not stop.is_set():
+            ring.put_end(timeout=1.0)
+        ring.close()
+
+
+class RingCapture:
+    """
+    cv2.VideoCapture look-alike whose frames are decoded in a separate
+    process and handed over through a FrameRing.
+
+    read() returns a view into shared memory that stays valid until the
+    next read(), so it drops into get_lane_density / get_lane_state /
+    LaneDensityWorker unchanged. The capture process loops the video
+    itself, so set(CAP_PROP_POS_FRAMES, 0) is a no-op here. Frames are
+    decoded at `width` via open_video when ffmpeg is available.
+    """
+
+    def __init__(self, source, slots=4, loop=True, block=True, timeout=10.0, width=DETECT_WIDTH):
+        self.width, self.height, self.fps, self.scale = output_geometry(source, width)
+
+        ctx = mp.get_context("spawn")
+        self.ring = FrameRing(slots, (self.height, self.width, 3), np.uint8, ctx)
+        self.timeout = timeout
+        self.seq = -1
+        self.t = 0.0
+        self._stop = ctx.Event()
+        self._process = ctx.Process(
+            target=capture_worker,
+            args=(self.ring, source, self._stop, loop, block, width),
+            daemon=True
+        )
+        self._process.start()
+        self._ended = False
+
+    def isOpened(self):
+        return not self._ended
+
+    def read(self, image=None):
+        if self._ended:
+            return False, None
+        item = self.ring.get(timeout=self.timeout)
+        if item is None:
+            self._ended = True
+            return False, None
+        self.seq, self.t, frame = item
+        return True, frame
+
+    def get(self, prop):
+        import cv2
+
+        return {
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_POS_MSEC: self.t * 1000.0,
+            cv2.CAP_PROP_POS_FRAMES: self.seq + 1,
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+        }.get(prop, 0.0)
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        if self._process is None:
+            return
+        self._stop.set()
+        self.ring.release()
+        self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+        self._ended = True
+        self.ring.close()
@@ -0,0 +1,178 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+# YOLO's default input size: decoding wider frames only for the detector
+# to shrink them again is wasted work
+DETECT_WIDTH = 640
+
+
+def probe(source):
+    """(width, height, fps, frame_count) of a video source."""
+    import cv2
+
+    cap = cv2.VideoCapture(str(source) if isinstance(source, Path) else source)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video source {source}")
+    info = (
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        cap.get(cv2.CAP_PROP_FPS) or 30.0,
+        int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+    )
+    cap.release()
+    return info
+
+
+def scaled_size(width, height, target_width):
+    """Output size for target_width keeping aspect ratio (even dimensions, never upscaled)."""
+    if not target_width or target_width >= width:
+        return width, height
+    out_w = target_width - target_width % 2
+    out_h = max(int(round(height * out_w / width / 2)) * 2, 2)
+    return out_w, out_h
+
+
+class FFmpegFrameSource:
+    """
+    Video reader that decodes at detector resolution.
+
+    ffmpeg scales (and optionally decimates to `fps`) inside the decoder
+    and writes bgr24 rawvideo to a pipe, which is read straight into a
+    few preallocated NumPy buffers. Frames cost a fraction of the decode
+    CPU of full resolution and no per-frame allocation.
+
+    Mirrors the parts of cv2.VideoCapture the vision code uses (read,
+    get, set(CAP_PROP_POS_FRAMES), release), so it can replace it in
+    get_lane_density / get_lane_state and the sensors. A frame returned by
+    read() stays valid for the next `buffers - 1` reads; pass image= to
+    read into your own buffer instead.
+
+    `scale` is output width / source width; pixel-based calibrations such
+    as meters_per_pixel must be divided by it.
+    """
+
+    def __init__(self, source, width=DETECT_WIDTH, fps=None, buffers=2, ffmpeg="ffmpeg"):
+        import cv2
+
+        self._cv2 = cv2
+        self.source = str(source)
+        self.ffmpeg = ffmpeg
+        src_w, src_h, self.src_fps, src_frames = probe(source)
+        self.width, self.height = scaled_size(src_w, src_h, width)
+        self.scale = self.width / src_w
+        self.fps = min(fps, self.src_fps) if fps else self.src_fps
+        self.frame_count = int(src_frames * self.fps / self.src_fps)
+
+        self._buffers = np.empty((buffers, self.height, self.width, 3), dtype=np.uint8)
+        self._next = 0
+        self.frame_idx = 0
+        self._proc = None
+        self._start(0)
+
+    def _command(self, start_frame):
+        cmd = [self.ffmpeg, "-loglevel", "error", "-nostdin"]
+        if start_frame:
+            cmd += ["-ss", f"{start_frame / self.fps:.3f}"]
+        cmd += ["-i", self.source]
+
+        filters = []
+        if self.fps < self.src_fps:
+            filters.append(f"fps={self.fps}")
+        if self.scale != 1:
+            filters.append(f"scale={self.width}:{self.height}:flags=area")
+        if filters:
+            cmd += ["-vf", ",".join(filters)]
+        return cmd + ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+
+    def _start(self, start_frame):
+        self._proc = subprocess.Popen(
+            self._command(start_frame),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self.frame_idx = start_frame
+
+    def _stop(self):
+        if self._proc is None:
+            return
+        self._proc.stdout.close()
+        self._proc.terminate()
+        self._proc.wait()
+        self._proc = None
+
+    def isOpened(self):
+        return self._proc is not None
+
+    def read(self, image=None):
+        if self._proc is None:
+            return False, None
+
+        shape = (self.height, self.width, 3)
+        if (image is not None and image.shape == shape and image.dtype == np.uint8
+                and image.flags.c_contiguous):
+            out = image
+        else:
+            out = self._buffers[self._next]
+            self._next = (self._next + 1) % len(self._buffers)
+
+        view = memoryview(out).cast("B")
+        got = 0
+        while got < len(view):
+            n = self._proc.stdout.readinto(view[got:])
+            if not n:
+                # End of stream; set(CAP_PROP_POS_FRAMES, 0) restarts it
+                self._stop()
+                return False, None
+            got += n
+
+        self.frame_idx += 1
+        return True, out
+
+    def get(self, prop):
+        cv2 = self._cv2
+        return {
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_POS_FRAMES: self.frame_idx,
+            cv2.CAP_PROP_POS_MSEC: max(self.frame_idx - 1, 0) / self.fps * 1000.0,
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FRAME_COUNT: self.frame_count,
+        }.get(prop, 0.0)
+
+    def set(self, prop, value):
+        if prop != self._cv2.CAP_PROP_POS_FRAMES:
+            return False
+        self._stop()
+        self._start(int(value))
+        return True
+
+    def release(self):
+        self._stop()
+
+
+def _use_ffmpeg(source, width):
+    return bool(width) and isinstance(source, (str, Path)) and shutil.which("ffmpeg") is not None
+
+
+def output_geometry(source, width=DETECT_WIDTH):
+    """(width, height, fps, scale) of the frames open_video(source, width) will return."""
+    src_w, src_h, fps, _ = probe(source)
+    if not _use_ffmpeg(source, width):
+        return src_w, src_h, fps, 1.0
+    out_w, out_h = scaled_size(src_w, src_h, width)
+    return out_w, out_h, fps, out_w / src_w
+
+
+def open_video(source, width=DETECT_WIDTH, fps=None):
+    """
+    FFmpegFrameSource for video files when ffmpeg is on PATH and a
+    `width` is given, else a plain cv2.VideoCapture (device indices,
+    width=None, no ffmpeg).
+    """
+    if _use_ffmpeg(source, width):
+        return FFmpegFrameSource(source, width=width, fps=fps)
+
+    import cv2
+    return cv2.VideoCapture(str(source) if isinstance(source, Path) else source)
@@ -1,26 +1,188 @@
 import cv2
+from concurrent.futures import ThreadPoolExecutor
 from vision.detector import VehicleDetector
+from vision.frame_source import open_video
+from vision.lane_mapper import get_lane_mapper, get_camera_config
+from vision.tracker import IoUTracker
+from vision.motion_gate import MotionGate
 
+# Camera entry in vision/lane_config.json used for lane polygons
+CAMERA = "default"
 
-def get_lane_density(video_path=None, cap=None):
+# Reuse the previous detections when the lane ROIs barely changed
+MOTION_GATING = True
+
+# Columns of the tracker's per-lane metrics array (IoUTracker.lane_metrics)
+METRICS = ["queue", "waiting", "speed", "count"]
+
+_detector = None
+_trackers = {}
+_gates = {}
+
+
+def get_detector():
+    """Load the YOLO detector once and reuse it across calls."""
+    global _detector
+    if _detector is None:
+        _detector = VehicleDetector()
+    return _detector
+
+
+def get_lane_density(video_path=None, cap=None, camera=CAMERA):
     """
-    Extract vehicle count (density) from video frame.
+    Extract per-lane vehicle count (density) from video frame.
     
     Returns:
-        dict: {"north_in": count}
+        dict: {lane_name: count} for the camera's configured lanes
     """
     if cap is None:
-        cap = cv2.VideoCapture(video_path)
+        cap = open_video(video_path)
     
     ret, frame = cap.read()
     if not ret:
         cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
         ret, frame = cap.read()
     
-    detector = VehicleDetector()
-    detections = detector.detect(frame)
+    boxes = _detect(frame, camera)
+    
+    # Map box centroids onto the camera's lane polygons; boxes outside
+    # every ROI are dropped
+    mapper = get_lane_mapper(camera)
+    _, lane_idx = mapper.assign(boxes, frame.shape)
+    
+    return mapper.counts(lane_idx)
+
+
+def _detect(frame, camera):
+    """Detector boxes for a frame, motion-gated per camera if enabled."""
+    detector = get_detector()
+    if not MOTION_GATING:
+        return detector.detect_array(frame)
+    
+    gate = _gates.get(camera)
+    if gate is None:
+        gate = _gates[camera] = MotionGate(get_lane_mapper(camera))
+    return gate.detect(detector, frame)
+
+
+def make_tracker(camera=CAMERA, scale=1.0):
+    """
+    IoUTracker scaled with the camera's meters_per_pixel.
+
+    meters_per_pixel is calibrated at the camera's native resolution;
+    pass the capture's `scale` when frames are decoded smaller.
+    """
+    mpp = get_camera_config(camera).get("meters_per_pixel", 0.05)
+    return IoUTracker(meters_per_pixel=mpp / scale)
+
+
+def compute_lane_metrics(frame, t, camera, tracker, sim_t=None):
+    """
+    Detect, map to lanes and update the tracker for one frame.
+    
+    t is the frame timestamp; sim_t, when given, is the simulation time
+    the frame stands for, and waiting time accumulates in it.
+    
+    Returns:
+        np.array (lanes, 4) float32: METRICS per lane, rows in the
+        camera's lane_names order, with the same meaning as the SUMO
+        lane metrics
+    """
+    boxes = _detect(frame, camera)
+    mapper = get_lane_mapper(camera)
+    boxes, lane_idx = mapper.assign(boxes, frame.shape)
+    tracker.update(boxes, lane_idx, t, sim_t)
+    
+    return tracker.lane_metrics(len(mapper.lane_names))
+
+
+def compute_lane_state(frame, t, camera, tracker, sim_t=None):
+    """
+    compute_lane_metrics as a dict.
+    
+    Returns:
+        dict: {lane_name: {"queue", "waiting", "speed", "count"}}
+    """
+    metrics = compute_lane_metrics(frame, t, camera, tracker, sim_t)
+    return _as_state(metrics, camera)
+
+
+def _as_state(metrics, camera):
+    return {
+        lane: {
+            "queue": float(row[0]),
+            "waiting": float(row[1]),
+            "speed": float(row[2]),
+            "count": int(row[3]),
+        }
+        for lane, row in zip(get_lane_mapper(camera).lane_names, metrics)
+    }
+
+
+def _frame_time(cap):
+    t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+    if t <= 0:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        t = cap.get(cv2.CAP_PROP_POS_FRAMES) / fps
+    return t
+
+
+def get_lane_metrics(video_path=None, cap=None, camera=CAMERA, sim_t=None):
+    """
+    Tracked per-lane metrics array (see compute_lane_metrics) from the
+    next video frame.
+    
+    Keeps one tracker per camera across calls, so queue, waiting time and
+    speed come from vehicles followed over consecutive frames.
+    """
+    if cap is None:
+        cap = open_video(video_path)
+    
+    ret, frame = cap.read()
+    if not ret:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        ret, frame = cap.read()
     
-    # All vehicles detected are in the "north_in" lane (single camera)
-    vehicle_count = len(detections)
+    tracker = _trackers.get(camera)
+    if tracker is None:
+        tracker = _trackers[camera] = make_tracker(camera, getattr(cap, "scale", 1.0))
     
-    return {"north_in": vehicle_count}
+    return compute_lane_metrics(frame, _frame_time(cap), camera, tracker, sim_t)
+
+
+def get_lane_state(video_path=None, cap=None, camera=CAMERA, sim_t=None):
+    """get_lane_metrics as {lane_name: {"queue", "waiting", "speed", "count"}}."""
+    return _as_state(get_lane_metrics(video_path, cap, camera, sim_t), camera)
+
+
+class LaneDensityWorker:
+    """
+    Computes get_lane_density (or another per-frame function such as
+    get_lane_state or get_lane_metrics) on a background thread.
+
+    Call submit() when the controller starts holding green and result()
+    when it needs the next state. Frame decode and YOLO inference release
+    the GIL, so the detection overlaps the TraCI stepping and the
+    per-decision latency becomes max(detect, hold) instead of the sum.
+    """
+
+    def __init__(self, cap, fn=get_lane_density):
+        self.cap = cap
+        self.fn = fn
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future = None
+
+    def submit(self, **kwargs):
+        """Start a detection; kwargs (e.g. sim_t) are passed on to fn."""
+        if self._future is None:
+            self._future = self._executor.submit(self.fn, cap=self.cap, **kwargs)
+
+    def result(self, **kwargs):
+        """Block until the pending detection is done and return its density."""
+        self.submit(**kwargs)
+        density = self._future.result()
+        self._future = None
+        return density
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -1,6 +1,102 @@
-def assign_to_lanes(vehicles):
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Per-camera lane polygons in normalized [0, 1] image coordinates:
+# {"<camera>": {"meters_per_pixel": float,
+#               "lanes": {"<lane_name>": [[x, y], ...]}}}
+LANE_CONFIG = Path(__file__).parent / "lane_config.json"
+
+_mappers = {}
+
+
+class LaneMapper:
     """
-    Assign all detected vehicles to lane 0
-    (single-direction camera)
+    Assigns detection boxes to lanes with per-camera polygon masks.
+
+    The polygons are rasterized once per frame size into a label mask
+    (0 = outside every ROI, i = lane i - 1), so assigning N boxes is a
+    single fancy-indexing lookup of their centroids.
     """
-    return {0: len(vehicles)}
+
+    def __init__(self, lanes):
+        self.lane_names = list(lanes)
+        self.polygons = [np.asarray(p, dtype=np.float32) for p in lanes.values()]
+        self._masks = {}
+
+    def mask(self, height, width):
+        key = (height, width)
+        label_mask = self._masks.get(key)
+        if label_mask is None:
+            label_mask = np.zeros((height, width), dtype=np.uint8)
+            scale = np.array([width - 1, height - 1], dtype=np.float32)
+            for i, poly in enumerate(self.polygons):
+                pts = np.round(poly * scale).astype(np.int32)
+                cv2.fillPoly(label_mask, [pts], i + 1)
+            self._masks[key] = label_mask
+        return label_mask
+
+    def assign(self, boxes, frame_shape):
+        """
+        Args:
+            boxes: (N, 4) array-like of x1, y1, x2, y2
+            frame_shape: shape of the frame the boxes come from
+
+        Returns:
+            (boxes, lane_idx): boxes inside some ROI and their lane indices
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        height, width = frame_shape[:2]
+        label_mask = self.mask(height, width)
+
+        cx = ((boxes[:, 0] + boxes[:, 2]) * 0.5).astype(np.intp)
+        cy = ((boxes[:, 1] + boxes[:, 3]) * 0.5).astype(np.intp)
+        np.clip(cx, 0, width - 1, out=cx)
+        np.clip(cy, 0, height - 1, out=cy)
+
+        lane_idx = label_mask[cy, cx].astype(np.intp) - 1
+        keep = lane_idx >= 0
+        return boxes[keep], lane_idx[keep]
+
+    def counts(self, lane_idx):
+        """Vehicle count per lane name from assigned lane indices."""
+        c = np.bincount(lane_idx, minlength=len(self.lane_names))
+        return dict(zip(self.lane_names, c.tolist()))
+
+
+def load_lane_config(path=LANE_CONFIG):
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_camera_config(camera="default", config_path=LANE_CONFIG):
+    return load_lane_config(config_path)[camera]
+
+
+def get_lane_mapper(camera="default", config_path=LANE_CONFIG):
+    """Return the cached LaneMapper for a camera."""
+    key = (str(config_path), camera)
+    mapper = _mappers.get(key)
+    if mapper is None:
+        mapper = LaneMapper(get_camera_config(camera, config_path)["lanes"])
+        _mappers[key] = mapper
+    return mapper
+
+
+def assign_to_lanes(vehicles, frame_shape=None, camera=None):
+    """
+    Count detected vehicles per lane.
+
+    Without a camera (or frame shape) all vehicles go to lane 0
+    (single-direction camera). With a camera configured in
+    lane_config.json, box centroids are mapped through its lane polygons
+    and boxes outside every ROI are dropped.
+    """
+    if camera is None or frame_shape is None:
+        return {0: len(vehicles)}
+
+    mapper = get_lane_mapper(camera)
+    _, lane_idx = mapper.assign(vehicles, frame_shape)
+    return mapper.counts(lane_idx)
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Skips YOLO on frames where the lane ROIs have not changed.
+
+    Frames are downscaled to `width` pixels wide and converted to gray;
+    the fraction of ROI pixels whose absolute difference from the last
+    detected frame exceeds `pixel_delta` is the motion score. Below
+    `threshold` the previous detections are reused, but never for more
+    than `refresh_interval` frames in a row.
+
+    Use one gate per camera: it keeps that camera's reference frame.
+    """
+
+    def __init__(self, mapper=None, width=160, threshold=0.01,
+                 pixel_delta=25, refresh_interval=15):
+        self.mapper = mapper
+        self.width = width
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.refresh_interval = refresh_interval
+
+        self.reference = None
+        self.roi = None
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.since_refresh = 0
+        self.frames = 0
+        self.skipped = 0
+
+    def _small_gray(self, frame):
+        h, w = frame.shape[:2]
+        height = max(1, int(round(h * self.width / w)))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def motion(self, small):
+        """Fraction of ROI pixels that changed since the reference frame."""
+        if self.roi is None or self.roi.shape != small.shape:
+            if self.mapper is not None:
+                self.roi = self.mapper.mask(*small.shape) > 0
+            else:
+                self.roi = np.ones(small.shape, dtype=bool)
+        changed = cv2.absdiff(small, self.reference) > self.pixel_delta
+        return changed[self.roi].mean() if self.roi.any() else 0.0
+
+    def should_detect(self, frame):
+        small = self._small_gray(frame)
+        self.frames += 1
+
+        if (
+            self.reference is None
+            or self.reference.shape != small.shape
+            or self.since_refresh >= self.refresh_interval
+            or self.motion(small) >= self.threshold
+        ):
+            self.reference = small
+            self.since_refresh = 0
+            return True
+
+        self.since_refresh += 1
+        self.skipped += 1
+        return False
+
+    def detect(self, detector, frame):
+        """Run detector.detect_array only when the gate opens."""
+        if self.should_detect(frame):
+            self.boxes = detector.detect_array(frame)
+        return self.boxes
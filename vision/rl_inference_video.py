@@ -7,6 +7,7 @@ import numpy as np
 
 from detector import VehicleDetector
 from lane_mapper import assign_to_lanes
+from frame_source import open_video
 from rl.agent import DQNAgent
 
 from pathlib import Path
@@ -28,9 +29,11 @@ agent.epsilon = 0.0   # VERY IMPORTANT → no exploration
 # ----------------------------
 detector = VehicleDetector()
 
+# Camera entry in lane_config.json used for lane polygons
+CAMERA = "default"
 
 VIDEO_PATH = Path(__file__).parent / "test_video.mp4"
-cap = cv2.VideoCapture(str(VIDEO_PATH))
+cap = open_video(VIDEO_PATH)
 
 print("Video path:", VIDEO_PATH)
 print("Video opened:", cap.isOpened())
@@ -47,7 +50,7 @@ while cap.isOpened():
     vehicles = detector.detect(frame)
 
     # 2. Map to lanes
-    lane_counts = assign_to_lanes(vehicles)
+    lane_counts = assign_to_lanes(vehicles, frame.shape, CAMERA)
 
     # 3. Build RL state vector
     # Since vision only gives counts, replicate them for [queue, wait, flow]
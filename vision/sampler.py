@@ -0,0 +1,165 @@
+"""
+Side-channel vision sampling, off the controller's critical path.
+
+VisionSampler runs detection on a worker thread at most once every
+`every` simulated seconds; request() never blocks, and a request made
+while the worker is still busy is skipped. VisionTrack serves counts
+from a precomputed CSV (time, count) instead. Either way the samples are
+joined onto the per-step log by timestamp afterwards with join_by_time.
+
+Precompute a track from a video:
+    python vision/sampler.py test_video.mp4 --every 1 --out data/video_track.csv
+"""
+import argparse
+import csv
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# First line of a precomputed track: the video duration in seconds
+DURATION_PREFIX = "# duration="
+
+
+def join_by_time(times, sample_times, sample_values, fill=0):
+    """
+    Latest sample at or before each time (as-of join).
+
+    Returns:
+        np.array with one value per entry of `times`; `fill` before the
+        first sample
+    """
+    times = np.asarray(times)
+    sample_times = np.asarray(sample_times)
+    sample_values = np.asarray(sample_values)
+    if len(sample_times) == 0:
+        return np.full(len(times), fill)
+
+    order = np.argsort(sample_times, kind="stable")
+    sample_times = sample_times[order]
+    sample_values = sample_values[order]
+
+    idx = np.searchsorted(sample_times, times, side="right") - 1
+    out = sample_values[np.maximum(idx, 0)]
+    return np.where(idx >= 0, out, fill)
+
+
+class VisionSampler:
+    """
+    Args:
+        sample_fn: callable returning the value to log (e.g. a lane count)
+        every: minimum simulated seconds between samples
+    """
+
+    def __init__(self, sample_fn, every=10):
+        self.sample_fn = sample_fn
+        self.every = every
+        self.samples = []  # (sim_time, value), appended by the worker
+        self._next_time = 0
+        self._busy = threading.Lock()
+        self._thread = None
+
+    def request(self, sim_time):
+        """Start a sample tagged with sim_time if one is due and the worker is idle."""
+        if sim_time < self._next_time or not self._busy.acquire(blocking=False):
+            return
+        self._next_time = sim_time + self.every
+        self._thread = threading.Thread(target=self._run, args=(sim_time,), daemon=True)
+        self._thread.start()
+
+    def _run(self, sim_time):
+        try:
+            self.samples.append((sim_time, self.sample_fn()))
+        finally:
+            self._busy.release()
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def join(self, times, fill=0):
+        samples = list(self.samples)
+        sample_times = [t for t, _ in samples]
+        sample_values = [v for _, v in samples]
+        return join_by_time(times, sample_times, sample_values, fill)
+
+
+class VisionTrack:
+    """
+    Precomputed (time, count) samples loaded from CSV.
+
+    The track wraps with the video's duration from the file's
+    "# duration=" line; tracks written without one wrap one sample
+    interval after their last sample.
+    """
+
+    def __init__(self, path):
+        with open(path) as f:
+            first = f.readline()
+            if first.startswith(DURATION_PREFIX):
+                self.duration = float(first[len(DURATION_PREFIX):])
+                f.readline()  # column header
+            else:
+                self.duration = None
+            data = np.loadtxt(f, delimiter=",", ndmin=2)
+        self.times = data[:, 0]
+        self.values = data[:, 1].astype(np.int64)
+        if self.duration is None and len(self.times):
+            interval = np.median(np.diff(self.times)) if len(self.times) > 1 else 1.0
+            self.duration = self.times[-1] + interval
+
+    def request(self, sim_time):
+        pass
+
+    def close(self):
+        pass
+
+    def join(self, times, fill=0):
+        # Tracks shorter than the run loop, like the video does
+        times = np.asarray(times)
+        if len(self.times):
+            times = np.mod(times, self.duration)
+        return join_by_time(times, self.times, self.values, fill)
+
+
+def precompute_track(video_path, out_path, every=1.0, lane="north_in"):
+    """
+    Detect every `every` video seconds and write a time,count CSV,
+    preceded by the video's duration for VisionTrack to wrap with.
+    """
+    import cv2
+    from vision.lane_density import get_lane_density
+
+    cap = cv2.VideoCapture(str(video_path))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    stride = max(1, int(round(every * fps)))
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    rows = []
+    for frame_idx in range(0, total, stride):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        rows.append((frame_idx / fps, get_lane_density(cap=cap).get(lane, 0)))
+    cap.release()
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", newline="") as f:
+        f.write(f"{DURATION_PREFIX}{total / fps}\n")
+        writer = csv.writer(f)
+        writer.writerow(["time", "count"])
+        writer.writerows(rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent.parent))
+
+    parser = argparse.ArgumentParser(description="Precompute a video count track")
+    parser.add_argument("video")
+    parser.add_argument("--every", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--lane", default="north_in")
+    parser.add_argument("--out", default="data/video_track.csv")
+    args = parser.parse_args()
+
+    n = precompute_track(args.video, args.out, args.every, args.lane)
+    print(f"✅ Wrote {n} samples to {args.out}")
@@ -0,0 +1,173 @@
+import numpy as np
+
+# SUMO counts a vehicle as halting below 0.1 m/s; pixel jitter needs
+# a little more headroom
+HALT_SPEED = 0.5       # m/s
+FREE_SPEED = 13.0      # m/s, speed reported for a lane with no measured speed (edge speed)
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (K, 4) and (N, 4) xyxy boxes -> (K, N)."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+class IoUTracker:
+    """
+    Links detections across frames by IoU and derives per-lane state.
+
+    Tracks live in parallel NumPy arrays (boxes, lane, speed, waiting,
+    first/last seen) rather than per-track objects. Matching is the
+    vectorized mutual-best-IoU rule: detection j continues track i when
+    each is the other's best match and IoU >= iou_threshold.
+
+    A new track has no speed (NaN) until it is matched once; its first
+    measured displacement sets the speed directly, later ones are
+    smoothed. Unclassified tracks count as vehicles but neither as
+    halting nor in the mean speed.
+
+    lane_metrics() mirrors the SUMO lane semantics used in the state:
+    queue = halting vehicles, waiting = summed waiting time of halting
+    vehicles (reset when a vehicle moves), speed = mean speed in m/s.
+    Waiting accumulates in simulation seconds when update() is given
+    sim_t (frames are often sampled once per decision, far apart in sim
+    time but adjacent in the video), otherwise in frame-timestamp seconds.
+    """
+
+    def __init__(self, meters_per_pixel=0.05, iou_threshold=0.3, max_age=5,
+                 halt_speed=HALT_SPEED, free_speed=FREE_SPEED, smoothing=0.5):
+        self.meters_per_pixel = meters_per_pixel
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.halt_speed = halt_speed
+        self.free_speed = free_speed
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.lane = np.empty(0, dtype=np.intp)
+        self.speed = np.empty(0, dtype=np.float32)      # m/s, smoothed; NaN until measured
+        self.waiting = np.empty(0, dtype=np.float32)    # s halted since last move
+        self.first_seen = np.empty(0, dtype=np.float64)
+        self.misses = np.empty(0, dtype=np.int32)
+        self.last_t = None
+        self.last_sim_t = None
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def update(self, boxes, lane_idx, t, sim_t=None):
+        """
+        Args:
+            boxes: (N, 4) xyxy boxes already filtered to lane ROIs
+            lane_idx: (N,) lane index of each box
+            t: frame timestamp in seconds (used for speed)
+            sim_t: simulation time of this observation (used for waiting)
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        lane_idx = np.asarray(lane_idx, dtype=np.intp)
+
+        # Video looped or either clock jumped backwards: start over
+        if (self.last_t is not None and t < self.last_t) or \
+                (sim_t is not None and self.last_sim_t is not None and sim_t < self.last_sim_t):
+            self.reset()
+        dt = 0.0 if self.last_t is None else t - self.last_t
+        if sim_t is None:
+            wait_dt = dt
+        else:
+            wait_dt = 0.0 if self.last_sim_t is None else sim_t - self.last_sim_t
+        self.last_t = t
+        self.last_sim_t = sim_t
+
+        track_idx = np.empty(0, dtype=np.intp)
+        det_idx = np.empty(0, dtype=np.intp)
+        if len(self.boxes) and len(boxes):
+            iou = iou_matrix(self.boxes, boxes)
+            best_det = iou.argmax(axis=1)
+            best_track = iou.argmax(axis=0)
+            rows = np.arange(len(self.boxes))
+            mutual = (best_track[best_det] == rows) & \
+                     (iou[rows, best_det] >= self.iou_threshold)
+            track_idx = rows[mutual]
+            det_idx = best_det[mutual]
+
+        # Matched tracks: centroid displacement -> speed, accumulate waiting
+        if len(track_idx) and dt > 0:
+            old_c = _centroids(self.boxes[track_idx])
+            new_c = _centroids(boxes[det_idx])
+            inst = np.linalg.norm(new_c - old_c, axis=1) * self.meters_per_pixel / dt
+            old = self.speed[track_idx]
+            self.speed[track_idx] = np.where(
+                np.isnan(old), inst, self.smoothing * old + (1 - self.smoothing) * inst
+            )
+            halted = self.speed[track_idx] < self.halt_speed
+            self.waiting[track_idx] = np.where(
+                halted, self.waiting[track_idx] + wait_dt, 0.0
+            )
+        self.boxes[track_idx] = boxes[det_idx]
+        self.lane[track_idx] = lane_idx[det_idx]
+
+        self.misses += 1
+        self.misses[track_idx] = 0
+
+        # Unmatched detections start new tracks
+        new = np.ones(len(boxes), dtype=bool)
+        new[det_idx] = False
+        n_new = int(new.sum())
+        if n_new:
+            self.boxes = np.concatenate([self.boxes, boxes[new]])
+            self.lane = np.concatenate([self.lane, lane_idx[new]])
+            self.speed = np.concatenate([self.speed, np.full(n_new, np.nan, np.float32)])
+            self.waiting = np.concatenate([self.waiting, np.zeros(n_new, np.float32)])
+            self.first_seen = np.concatenate([self.first_seen, np.full(n_new, t)])
+            self.misses = np.concatenate([self.misses, np.zeros(n_new, np.int32)])
+
+        # Drop tracks unseen for more than max_age frames
+        alive = self.misses <= self.max_age
+        if not alive.all():
+            self.boxes = self.boxes[alive]
+            self.lane = self.lane[alive]
+            self.speed = self.speed[alive]
+            self.waiting = self.waiting[alive]
+            self.first_seen = self.first_seen[alive]
+            self.misses = self.misses[alive]
+
+    def dwell(self):
+        """Seconds each track has been in view."""
+        if self.last_t is None:
+            return np.empty(0, dtype=np.float64)
+        return self.last_t - self.first_seen
+
+    def lane_metrics(self, num_lanes):
+        """
+        Returns:
+            np.array (num_lanes, 4) float32: queue, waiting, speed, count
+        """
+        visible = self.misses == 0
+        lane = self.lane[visible]
+        speed = self.speed[visible]
+        measured = ~np.isnan(speed)
+        halted = speed < self.halt_speed
+
+        count = np.bincount(lane, minlength=num_lanes)
+        queue = np.bincount(lane, weights=halted.astype(np.float64), minlength=num_lanes)
+        waiting = np.bincount(lane, weights=self.waiting[visible] * halted, minlength=num_lanes)
+        n_measured = np.bincount(lane, weights=measured.astype(np.float64), minlength=num_lanes)
+        speed_sum = np.bincount(lane, weights=np.where(measured, speed, 0.0), minlength=num_lanes)
+        speed = np.where(n_measured > 0, speed_sum / np.maximum(n_measured, 1), self.free_speed)
+
+        return np.stack([queue, waiting, speed, count], axis=1).astype(np.float32)
+
+
+def _centroids(boxes):
+    return np.stack(
+        [(boxes[:, 0] + boxes[:, 2]) * 0.5, (boxes[:, 1] + boxes[:, 3]) * 0.5], axis=1
+    )
@@ -1,9 +1,13 @@
 import cv2
 from detector import VehicleDetector
 from lane_mapper import assign_to_lanes
+from frame_source import open_video
+
+# Camera entry in lane_config.json used for lane polygons
+CAMERA = "default"
 
 detector = VehicleDetector()
-cap = cv2.VideoCapture("test_video.mp4")
+cap = open_video("test_video.mp4")
 
 frame_id = 0
 
@@ -13,7 +17,7 @@ while cap.isOpened():
         break
 
     vehicles = detector.detect(frame)
-    lane_counts = assign_to_lanes(vehicles)
+    lane_counts = assign_to_lanes(vehicles, frame.shape, CAMERA)
 
     print(f"Frame {frame_id} | {lane_counts}")
 